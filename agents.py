@@ -0,0 +1,82 @@
+from gamestate import GameState
+from uct_mcstsagent import UctMctsAgent
+from rave_mctsagent import RaveMctsAgent, DecisiveMoveMctsAgent, LGRMctsAgent, LGRFMctsAgent, PoolRaveMctsAgent
+from ucb1_tuned_mctsagent import UCB1TunedMctsAgent
+from qb_mctsagent import QBMctsAgent, QBRaveMctsAgent
+from rollouts import DecisiveMoveRollout, LGRRollout, LGRFRollout, PoolRaveRollout
+
+# search classes, each brings its node class (tree store) and selection formula
+SELECTIONS = {'uct': UctMctsAgent,
+              'rave': RaveMctsAgent,
+              'ucb1-tuned': UCB1TunedMctsAgent}
+
+# rollout policies, mixed in front of the search class
+ROLLOUTS = {'random': None,
+            'decisive-move': DecisiveMoveRollout,
+            'last-good-reply': LGRRollout,
+            'lgrf-2': LGRFRollout,
+            'poolrave': PoolRaveRollout}
+
+# backup rules, whether quality-based rewards are attached
+BACKUPS = {'plain': False,
+           'qb': True}
+
+AGENTS = {"UCT": UctMctsAgent,
+          "RAVE": RaveMctsAgent,
+          "LAST-GOOD-REPLY": LGRMctsAgent,
+          "POOLRAVE": PoolRaveMctsAgent,
+          "DECISIVE-MOVE": DecisiveMoveMctsAgent,
+          "UCB1-TUNED": UCB1TunedMctsAgent,
+          "QB": QBMctsAgent,
+          "QB-RAVE": QBRaveMctsAgent,
+          "LGRF-2": LGRFMctsAgent}
+
+
+def register(name: str, agent_class: type) -> None:
+    """
+    Make an agent class available by name to the GUI and the GTP front end.
+    """
+    AGENTS[name.upper()] = agent_class
+
+
+def compose(selection: str = 'uct', rollout: str = 'random', backup: str = 'plain') -> type:
+    """
+    Build an agent class out of named components, e.g.
+    compose('ucb1-tuned', 'lgrf-2', 'qb').
+
+    Raises:
+        KeyError if a component is unknown
+    """
+    search = SELECTIONS[selection]
+    policy = ROLLOUTS[rollout]
+    bases = (search,) if policy is None else (policy, search)
+    name = ''.join(part.title().replace('-', '') for part in (selection, rollout, backup)) + 'MctsAgent'
+    return type(name, bases, {'quality_based': BACKUPS[backup]})
+
+
+def agent_class(name: str) -> type:
+    """
+    Return the agent class registered under the passed name, or compose one from
+    a name of the form selection+rollout+backup (e.g. "rave+poolrave+qb").
+
+    Raises:
+        KeyError if the name is unknown
+    """
+    if name.upper() in AGENTS:
+        return AGENTS[name.upper()]
+    parts = name.lower().split('+')
+    if len(parts) > 3:
+        raise KeyError(name)
+    return compose(*parts)
+
+
+def make_agent(name: str, state: GameState = None, seed=None):
+    """
+    Create an agent by name.
+
+    Args:
+        name: registered name or selection+rollout+backup
+        state: initial game state, an empty 8x8 board by default
+        seed: seed of the random stream of the agent
+    """
+    return agent_class(name)(GameState(8) if state is None else state, seed)
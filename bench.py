@@ -0,0 +1,225 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from copy import deepcopy
+from time import perf_counter as clock
+
+from agents import AGENTS, make_agent
+from gamestate import GameState
+from meta import GameMeta
+from uct_mcstsagent import shared_cells
+
+SIZES = (5, 8, 11, 13, 19)
+
+# modules allocating the nodes of the tree, see bench_memory
+TREE_MODULES = ('uct_mcstsagent.py', 'rave_mctsagent.py', 'ucb1_tuned_mctsagent.py')
+
+# direction of every metric, True when a larger number is better
+METRICS = {'rollouts_per_sec': True,
+           'rollout_us': False,
+           'copy_us': False,
+           'select_us': False,
+           'expand_us': False,
+           'backup_us': False,
+           'iteration_us': False,
+           'bytes_per_node': False,
+           'tree_size': True,
+           'budget_rollouts': True}
+
+
+def bench_rollouts(agent, count: int) -> dict:
+    """
+    Time the rollout policy of the agent alone, from the root state and from
+    fresh copies of it which are made outside the timed region.
+
+    Returns:
+        dict: rollouts per second and microseconds per rollout
+    """
+    states = [deepcopy(agent.root_state) for _ in range(count)]
+    start = clock()
+    for state in states:
+        agent.roll_out(state)
+    elapsed = clock() - start
+    return {'rollouts_per_sec': count / elapsed, 'rollout_us': elapsed / count * 1e6}
+
+
+def bench_copy(state: GameState, count: int) -> dict:
+    """
+    Time deepcopy of the passed state, which every iteration of the search pays
+    once in select_node.
+    """
+    start = clock()
+    for _ in range(count):
+        deepcopy(state)
+    return {'copy_us': (clock() - start) / count * 1e6}
+
+
+def iterate(agent, iterations: int) -> int:
+    """
+    Run the passed number of iterations of the search loop of the agent.
+
+    Returns:
+        int: number of iterations run, fewer if the root position got solved
+    """
+    done = 0
+    while done < iterations and agent.root.outcome == GameMeta.PLAYERS['none']:
+        agent.simulate()
+        done += 1
+    return done
+
+
+def bench_iterations(name: str, size: int, iterations: int, seed: int) -> dict:
+    """
+    Time the phases of a fixed number of search iterations from the empty board
+    with the search profiler. Select includes neither the copy of the root state
+    nor expand.
+    """
+    agent = make_agent(name, GameState(size), seed)
+    agent.set_profiling(True)
+    done = max(iterate(agent, iterations), 1)
+    report = agent.profiler.report()
+    total = sum(report[phase + '_time'] for phase in agent.profiler.PHASES)
+    return {'select_us': report['select_time'] / done * 1e6,
+            'expand_us': report['expand_time'] / done * 1e6,
+            'backup_us': report['backup_time'] / done * 1e6,
+            'iteration_us': total / done * 1e6}
+
+
+def bench_memory(name: str, size: int, iterations: int, seed: int) -> dict:
+    """
+    Measure the memory held by the tree of the agent after a fixed number of
+    iterations, divided by the number of its nodes. Only the memory allocated by
+    the modules building the tree is counted, so the random number batches, the
+    solver table and the other caches filled during the search are left out.
+    """
+    agent = make_agent(name, GameState(size), seed)
+    shared_cells(size)  # the cell table is allocated once per board size
+    tracemalloc.start()
+    iterate(agent, iterations)
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    filters = [tracemalloc.Filter(True, '*' + module) for module in TREE_MODULES]
+    memory = sum(stat.size for stat in snapshot.filter_traces(filters).statistics('filename'))
+    nodes = agent.tree_size()
+    return {'bytes_per_node': memory / nodes, 'nodes': nodes}
+
+
+def bench_budget(name: str, size: int, budget: float, seed: int) -> dict:
+    """
+    Run a normal timed search and report the size of the tree it builds.
+    """
+    agent = make_agent(name, GameState(size), seed)
+    agent.search(budget)
+    num_rollouts, node_count, run_time, profile = agent.statistics()
+    return {'tree_size': node_count, 'budget_rollouts': num_rollouts}
+
+
+def run(agents: list, sizes: list, rollouts: int = 200, iterations: int = 500, budget: float = 1.0,
+        seed: int = 0) -> dict:
+    """
+    Benchmark every agent on every board size.
+
+    Args:
+        agents: names of the agents, see agents.make_agent
+        sizes: board sizes
+        rollouts: number of rollouts timed for the rollout throughput
+        iterations: number of search iterations timed per phase and for the memory
+        budget: seconds of the timed search used for the tree size
+        seed: seed of the random streams of the agents
+
+    Returns:
+        dict: the settings of the run and one entry of metrics per agent and size
+    """
+    results = []
+    for name in agents:
+        for size in sizes:
+            agent = make_agent(name, GameState(size), seed)
+            entry = {'agent': name, 'size': size}
+            entry.update(bench_rollouts(agent, rollouts))
+            entry.update(bench_copy(agent.root_state, rollouts))
+            entry.update(bench_iterations(name, size, iterations, seed))
+            entry.update(bench_memory(name, size, iterations, seed))
+            entry.update(bench_budget(name, size, budget, seed))
+            results.append(entry)
+            print('%-16s %2d  %8.0f rollouts/s  %8.1f us/iteration  %6.0f bytes/node  %7d nodes'
+                  % (name, size, entry['rollouts_per_sec'], entry['iteration_us'], entry['bytes_per_node'],
+                     entry['tree_size']), file=sys.stderr)
+    return {'settings': {'rollouts': rollouts, 'iterations': iterations, 'budget': budget, 'seed': seed,
+                         'python': platform.python_version(), 'machine': platform.machine()},
+            'results': results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.1) -> list:
+    """
+    Compare a run against a saved baseline.
+
+    Args:
+        current: result of run()
+        baseline: result of an earlier run()
+        tolerance: relative change below which a metric counts as unchanged
+
+    Returns:
+        list: (agent, size, metric, baseline value, current value, relative change)
+              of every metric that got worse by more than the tolerance
+    """
+    old = {(entry['agent'], entry['size']): entry for entry in baseline['results']}
+    regressions = []
+    for entry in current['results']:
+        reference = old.get((entry['agent'], entry['size']))
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in reference or reference[metric] == 0:
+                continue
+            change = (entry[metric] - reference[metric]) / abs(reference[metric])
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append((entry['agent'], entry['size'], metric, reference[metric], entry[metric], change))
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """
+    Run the benchmarks from the command line, e.g.
+
+        python bench.py --agents UCT RAVE --sizes 5 11 --output bench.json
+        python bench.py --baseline bench.json
+
+    The exit status is 1 when a baseline is passed and some metric regressed.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the MCTS agents.')
+    parser.add_argument('--agents', nargs='+', default=list(AGENTS), help='agent names, all by default')
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help='board sizes')
+    parser.add_argument('--rollouts', type=int, default=200, help='rollouts timed per agent and size')
+    parser.add_argument('--iterations', type=int, default=500, help='search iterations timed per agent and size')
+    parser.add_argument('--budget', type=float, default=1.0, help='seconds of search for the tree size')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the agents')
+    parser.add_argument('--output', help='file the JSON results are written to, stdout by default')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative change allowed by the comparison')
+    args = parser.parse_args(argv)
+
+    current = run(args.agents, args.sizes, args.rollouts, args.iterations, args.budget, args.seed)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.tolerance)
+        for agent, size, metric, old, new, change in regressions:
+            print('REGRESSION %s %d %s: %.4g -> %.4g (%+.1f%%)' % (agent, size, metric, old, new, change * 100),
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print('No regression against %s' % args.baseline, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
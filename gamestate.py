@@ -1,7 +1,59 @@
+from random import Random
+
 from numpy import zeros, int_
 from unionfind import UnionFind
 from meta import GameMeta
 
+# zobrist keys per board size, shared by all game states of that size
+_ZOBRIST = {}
+
+
+def transform_cell(cell: tuple, transform: int, size: int) -> tuple:
+    """
+    Map a cell through one of the board symmetries. Transform 0 is the identity,
+    1 is the 180 degree rotation, 2 is the transpose and 3 the transpose of the
+    rotation; transforms 2 and 3 also swap the colors of the players. Every
+    transform is its own inverse so the same call maps moves back.
+
+    Args:
+        cell (tuple): row and column of the cell
+        transform (int): index of the symmetry
+        size (int): The board size
+    """
+    x, y = cell
+    if transform == 1:
+        return size - 1 - x, size - 1 - y
+    elif transform == 2:
+        return y, x
+    elif transform == 3:
+        return size - 1 - y, size - 1 - x
+    return x, y
+
+
+def zobrist_keys(size: int) -> dict:
+    """
+    Return the zobrist keys of the passed board size. For each color and cell the
+    keys are given already mapped through the four symmetries so that a placement
+    updates the hash of every transformed board at once. The keys are generated
+    from a fixed seed so hashes agree between processes and runs.
+
+    Returns:
+        dict: color -> cell -> tuple of four keys, and 'turn' -> color -> key
+    """
+    if size not in _ZOBRIST:
+        rng = Random(size)
+        white, black = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+        base = {(color, (x, y)): rng.getrandbits(64)
+                for color in (white, black) for x in range(size) for y in range(size)}
+        turn = {white: rng.getrandbits(64), black: rng.getrandbits(64)}
+        swap = {white: black, black: white}
+        keys = {'turn': turn, white: {}, black: {}}
+        for color, cell in base:
+            keys[color][cell] = tuple(base[(color if t < 2 else swap[color], transform_cell(cell, t, size))]
+                                      for t in range(4))
+        _ZOBRIST[size] = keys
+    return _ZOBRIST[size]
+
 
 class GameState:
     """
@@ -38,6 +90,8 @@ class GameState:
         self.black_groups = UnionFind()
         self.white_groups.set_ignored_elements([GameMeta.EDGE1, GameMeta.EDGE2])
         self.black_groups.set_ignored_elements([GameMeta.EDGE1, GameMeta.EDGE2])
+        # zobrist hash of the stones on the board under each of the four symmetries
+        self.hashes = [0, 0, 0, 0]
 
     def play(self, cell: tuple) -> None:
         """
@@ -83,6 +137,12 @@ class GameState:
             self.white_played += 1
         else:
             raise ValueError("Cell occupied")
+        keys = zobrist_keys(self.size)[GameMeta.PLAYERS['white']][cell]
+        hashes = self.hashes
+        hashes[0] ^= keys[0]
+        hashes[1] ^= keys[1]
+        hashes[2] ^= keys[2]
+        hashes[3] ^= keys[3]
         # if the placed cell touches a white edge connect it appropriately
         if cell[0] == 0:
             self.white_groups.join(GameMeta.EDGE1, cell)
@@ -105,6 +165,12 @@ class GameState:
             self.black_played += 1
         else:
             raise ValueError("Cell occupied")
+        keys = zobrist_keys(self.size)[GameMeta.PLAYERS['black']][cell]
+        hashes = self.hashes
+        hashes[0] ^= keys[0]
+        hashes[1] ^= keys[1]
+        hashes[2] ^= keys[2]
+        hashes[3] ^= keys[3]
         # if the placed cell touches a black edge connect it appropriately
         if cell[1] == 0:
             self.black_groups.join(GameMeta.EDGE1, cell)
@@ -175,6 +241,47 @@ class GameState:
         else:
             return GameMeta.PLAYERS['none']
 
+    @property
+    def hash(self) -> int:
+        """
+        Return the zobrist hash of the position, including the player to move.
+        """
+        return self.hashes[0] ^ zobrist_keys(self.size)['turn'][self.to_play]
+
+    def canonical(self) -> tuple:
+        """
+        Return the canonical hash of the position, the smallest hash among its
+        symmetric positions, and the transform that maps it there. Positions that
+        are equal up to rotation or the color swapping transpose share the same
+        canonical hash, so caches keyed on it store each of them once. Moves found
+        for the canonical position are mapped back with
+        transform_cell(move, transform, size).
+
+        Returns:
+            tuple: canonical hash and transform index
+        """
+        turn = zobrist_keys(self.size)['turn']
+        other = GameMeta.PLAYERS['white'] if self.to_play == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+        candidates = (self.hashes[0] ^ turn[self.to_play], self.hashes[1] ^ turn[self.to_play],
+                      self.hashes[2] ^ turn[other], self.hashes[3] ^ turn[other])
+        transform = min(range(4), key=lambda t: candidates[t])
+        return candidates[transform], transform
+
+    def canonical_board(self):
+        """
+        Return the board of the canonical position as a new array.
+        """
+        transform = self.canonical()[1]
+        board = zeros((self.size, self.size), dtype=self.board.dtype)
+        swap = {GameMeta.PLAYERS['none']: GameMeta.PLAYERS['none'],
+                GameMeta.PLAYERS['white']: GameMeta.PLAYERS['black'],
+                GameMeta.PLAYERS['black']: GameMeta.PLAYERS['white']}
+        for x in range(self.size):
+            for y in range(self.size):
+                color = self.board[x, y]
+                board[transform_cell((x, y), transform, self.size)] = swap[color] if transform >= 2 else color
+        return board
+
     def neighbors(self, cell: tuple) -> list:
         """
         Return list of neighbors of the passed cell.
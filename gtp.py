@@ -1,3 +1,10 @@
+import argparse
+import io
+import socketserver
+import sys
+import threading
+
+from agents import AGENTS, make_agent
 from gamestate import GameState
 from meta import GameMeta
 
@@ -12,20 +19,41 @@ class GTPInterface:
 
     """
 
-    def __init__(self, agent):
+    NAME = "HexPy"
+    VERSION = "1.0"
+
+    def __init__(self, agent, preload: bool = False):
         """
         Initilize the list of available commands, binding appropriate names to the
-        functions defined in this file.
+        functions defined in this file. The agent is either an agent object or the
+        name of an agent known to agents.make_agent (e.g. "RAVE" or "rave+lgrf-2+qb").
+        With preload an instance of every registered agent is made up front and
+        the agent command switches between them.
         """
         commands = {"size": self.gtp_boardsize, "reset": self.gtp_clear, "play": self.gtp_play,
                     "genmove": self.gtp_genmove, "print": self.gtp_show, "set_time": self.gtp_time,
-                    "winner": self.gtp_winner}
+                    "winner": self.gtp_winner, "agent": self.gtp_agent, "profile": self.gtp_profile,
+                    # standard GTP names
+                    "boardsize": self.gtp_boardsize, "clear_board": self.gtp_clear, "showboard": self.gtp_show,
+                    "time_left": self.gtp_time_left, "name": self.gtp_name, "version": self.gtp_version,
+                    "protocol_version": self.gtp_protocol_version, "known_command": self.gtp_known_command,
+                    "list_commands": self.gtp_list_commands, "quit": self.gtp_quit,
+                    # streaming analysis
+                    "analyze": self.gtp_analyze, "genmove_analyze": self.gtp_genmove_analyze}
         self.commands = commands
         self.game = GameState(8)
+        self.agents = {name: make_agent(name, self.game) for name in AGENTS} if preload else {}
+        if isinstance(agent, str):
+            agent = self.agents[agent.upper()] if agent.upper() in self.agents else make_agent(agent, self.game)
         self.agent = agent
-        self.agent.set_GameState(self.game)
+        self.agent.set_gamestate(self.game)
         self.move_time = 10
+        self.time_left = {}
         self.last_move = None
+        self.finished = False
+        self.write = None
+        self.analysis = None
+        self.pending_analysis = None
 
     def send_command(self, command):
         """
@@ -33,6 +61,8 @@ class GTPInterface:
         then return the response.
 
         """
+        # any command ends a running analysis
+        self.stop_analysis()
         parsed_command = command.split()
         # first word specifies function to call, the rest are args
         name = parsed_command[0]
@@ -57,7 +87,8 @@ class GTPInterface:
             return False, "Argument is not a valid size"
 
         self.game = GameState(size)
-        self.agent.set_GameState(self.game)
+        self.agent.set_gamestate(self.game)
+        self.time_left = {}
         self.last_move = None
         return True, ""
 
@@ -67,7 +98,8 @@ class GTPInterface:
 
         """
         self.game = GameState(self.game.size)
-        self.agent.set_GameState(self.game)
+        self.agent.set_gamestate(self.game)
+        self.time_left = {}
         self.last_move = None
         return True, ""
 
@@ -77,8 +109,8 @@ class GTPInterface:
         1st arg = colour (white/w or black/b)
         2nd arg = cell (i.e. g5)
 
-        Note: play order is not enforced but out of order turns will cause the
-        search tree to be reset
+        Note: play order is not enforced, after out of order turns the agent
+        keeps the part of its search tree holding the new position, if any
 
         """
         if len(args) < 2:
@@ -86,39 +118,38 @@ class GTPInterface:
         try:
             x = ord(args[1][0].lower()) - ord('a')
             y = int(args[1][1:]) - 1
+        except (ValueError, IndexError):
+            return False, "Malformed arguments"
+        if x < 0 or y < 0 or x >= self.game.size or y >= self.game.size:
+            return False, "Cell out of bounds"
+        if args[0][:1].lower() not in ('w', 'b'):
+            return False, "Player not recognized"
+        if self.game.board[x, y] != GameMeta.PLAYERS["none"]:
+            return False, "Cell occupied"
 
-            if x < 0 or y < 0 or x >= self.game.size or y >= self.game.size:
-                return False, "Cell out of bounds"
-
-            if args[0][0].lower() == 'w':
-                self.last_move = (x, y)
-                if self.game.turn() == GameMeta.PLAYERS["white"]:
-                    self.game.play((x, y))
-                    self.agent.move((x, y))
-                else:
-                    self.game.place_white((x, y))
-                    self.agent.set_GameState(self.game)
-
-            elif args[0][0].lower() == 'b':
-                self.last_move = (x, y)
-                if self.game.turn() == GameMeta.PLAYERS["black"]:
-                    self.game.play((x, y))
-                    self.agent.move((x, y))
-                else:
-                    self.game.place_black((x, y))
-                    self.agent.set_GameState(self.game)
+        self.last_move = (x, y)
+        if args[0][0].lower() == 'w':
+            if self.game.turn() == GameMeta.PLAYERS["white"]:
+                self.game.play((x, y))
+                self.agent.move((x, y))
             else:
-                return False, "Player not recognized"
-
-        except ValueError:
-            return False, "Malformed arguments"
+                self.game.place_white((x, y))
+                self.agent.set_gamestate(self.game)
+        else:
+            if self.game.turn() == GameMeta.PLAYERS["black"]:
+                self.game.play((x, y))
+                self.agent.move((x, y))
+            else:
+                self.game.place_black((x, y))
+                self.agent.set_gamestate(self.game)
+        return True, ""
 
     def gtp_genmove(self, args):
         """
         Allow the agent to play a stone of the given colour (white/w or black/b)
 
-        Note: play order is not enforced but out of order turns will cause the
-        agents search tree to be reset
+        Note: play order is not enforced, after out of order turns the agent
+        keeps the part of its search tree holding the new position, if any
 
         """
         # if user specifies a player generate the appropriate move
@@ -128,17 +159,17 @@ class GTPInterface:
                 if args[0][0].lower() == 'w':
                     if self.game.turn() != GameMeta.PLAYERS["white"]:
                         self.game.set_turn(GameMeta.PLAYERS["white"])
-                        self.agent.set_GameState(self.game)
+                        self.agent.set_gamestate(self.game)
 
                 elif args[0][0].lower() == 'b':
                     if self.game.turn() != GameMeta.PLAYERS["black"]:
                         self.game.set_turn(GameMeta.PLAYERS["black"])
-                        self.agent.set_GameState(self.game)
+                        self.agent.set_gamestate(self.game)
                 else:
                     return False, "Player not recognized"
 
             move = None
-            self.agent.search(self.move_time)
+            self.agent.search(self.search_time())
 
             if move is None:
                 move = self.agent.best_move()
@@ -153,6 +184,209 @@ class GTPInterface:
             return (False, "The game is already over" +
                     '\n' + 'The winner is ----> ' + str(self.send_command('winner')[1]), 0)
 
+    STREAMING = ("analyze", "genmove_analyze")
+
+    def analysis_arguments(self, args):
+        """
+        Parse the optional colour, interval (seconds) and number of moves of the
+        analysis commands, then set the player to move like genmove. Malformed
+        arguments leave the game untouched.
+
+        Returns:
+            tuple: (interval, k) or None if the arguments are malformed
+        """
+        player = None
+        if len(args) > 0 and args[0][:1].lower() in ('w', 'b'):
+            player = GameMeta.PLAYERS["white" if args[0][0].lower() == 'w' else "black"]
+            args = args[1:]
+        try:
+            interval = float(args[0]) if len(args) > 0 else 1.0
+            k = int(args[1]) if len(args) > 1 else 5
+        except ValueError:
+            return None
+        if interval <= 0 or k < 1:
+            return None
+        if player is not None and self.game.turn() != player:
+            self.game.set_turn(player)
+            self.agent.set_gamestate(self.game)
+        return interval, k
+
+    def report(self, k: int):
+        """
+        Return the search callback writing the top k root children as one line
+        of "info move <cell> visits <N> value <win rate> rave <win rate> pv <cells>".
+
+        """
+        def callback(agent):
+            infos = []
+            for child in agent.analysis(k):
+                info = 'info move %s visits %d value %.4f' % (self.cell(child['move']), child['N'], child['Q'])
+                if child['rave'] is not None:
+                    info += ' rave %.4f' % child['rave']
+                info += ' pv ' + ' '.join(self.cell(move) for move in child['pv'])
+                infos.append(info)
+            self.write(' '.join(infos) + '\n')
+        return callback
+
+    @staticmethod
+    def cell(move: tuple) -> str:
+        return chr(ord('a') + move[0]) + str(move[1] + 1)
+
+    def gtp_analyze(self, args):
+        """
+        Search the current position until the next command arrives, streaming
+        the top root children every interval seconds.
+        args = [colour] [interval] [k]
+
+        """
+        if self.write is None:
+            return False, "Analysis needs a streaming connection"
+        if self.game.winner != GameMeta.PLAYERS["none"]:
+            return False, "The game is already over"
+        parsed = self.analysis_arguments(args)
+        if parsed is None:
+            return False, "Malformed arguments"
+        interval, k = parsed
+
+        def analyze():
+            self.agent.search(float('inf'), self.report(k), interval)
+            self.write('\n')
+
+        self.pending_analysis = threading.Thread(target=analyze, daemon=True)
+        return True, ""
+
+    def gtp_genmove_analyze(self, args):
+        """
+        Like genmove, streaming the top root children every interval seconds
+        during the search and ending with "play <cell>". A command sent during
+        the search cuts it short.
+        args = [colour] [interval] [k]
+
+        """
+        if self.write is None:
+            return False, "Analysis needs a streaming connection"
+        if self.game.winner != GameMeta.PLAYERS["none"]:
+            return False, "The game is already over"
+        parsed = self.analysis_arguments(args)
+        if parsed is None:
+            return False, "Malformed arguments"
+        interval, k = parsed
+        search_time = self.search_time()
+
+        def genmove():
+            self.agent.search(search_time, self.report(k), interval)
+            move = self.agent.best_move()
+            self.game.play(move)
+            self.agent.move(move)
+            self.write('play ' + self.cell(move) + '\n\n')
+
+        self.pending_analysis = threading.Thread(target=genmove, daemon=True)
+        return True, ""
+
+    def start_analysis(self) -> None:
+        """
+        Start the analysis prepared by the last command, once its response has
+        been sent.
+
+        """
+        if self.pending_analysis is not None:
+            self.analysis, self.pending_analysis = self.pending_analysis, None
+            self.analysis.start()
+
+    def stop_analysis(self) -> None:
+        """
+        Interrupt the running analysis and wait until it has written its end.
+
+        """
+        self.pending_analysis = None
+        if self.analysis is not None:
+            self.agent.interrupt()
+            self.analysis.join()
+            # the search may have ended on its own before seeing the request
+            self.agent.interrupted = False
+            self.analysis = None
+
+    def gtp_agent(self, args):
+        """
+        Replace the agent by a new one given by name, keeping the current game.
+
+        """
+        if len(args) < 1:
+            return False, "Not enough arguments"
+        try:
+            agent = self.agents.get(args[0].upper()) or make_agent(args[0], self.game)
+        except KeyError:
+            return False, "Unknown agent"
+        agent.set_gamestate(self.game)
+        agent.set_profiling(self.agent.profiler is not None)
+        self.agent = agent
+        return True, ""
+
+    def gtp_profile(self, args):
+        """
+        Switch the search profiler of the agent on or off (on/off), or show the
+        profile of the last search when no argument is given.
+
+        """
+        if len(args) > 0:
+            if args[0].lower() not in ('on', 'off'):
+                return False, "Argument is not on or off"
+            self.agent.set_profiling(args[0].lower() == 'on')
+            return True, ""
+        if self.agent.profiler is None:
+            return False, "Profiling is off"
+        return True, str(self.agent.profiler)
+
+    def search_time(self) -> float:
+        """
+        Return the seconds to search for the next move: the time per move, cut
+        down to an even share of the remaining time of the player to move over
+        its expected remaining moves when the controller sent time_left.
+
+        """
+        player = "white" if self.game.turn() == GameMeta.PLAYERS["white"] else "black"
+        if player not in self.time_left:
+            return self.move_time
+        moves_left = max(len(self.game.moves()) // 2, 1)
+        return max(min(self.move_time, self.time_left[player] / moves_left), 0.01)
+
+    def gtp_time_left(self, args):
+        """
+        Record the time left on the clock of a player.
+        1st arg = colour (white/w or black/b)
+        2nd arg = seconds left
+
+        """
+        if len(args) < 2:
+            return False, "Not enough arguments"
+        if args[0][0].lower() not in ('w', 'b'):
+            return False, "Player not recognized"
+        try:
+            seconds = float(args[1])
+        except ValueError:
+            return False, "Argument is not a valid time"
+        self.time_left["white" if args[0][0].lower() == 'w' else "black"] = seconds
+        return True, ""
+
+    def gtp_name(self, args):
+        return True, self.NAME
+
+    def gtp_version(self, args):
+        return True, self.VERSION
+
+    def gtp_protocol_version(self, args):
+        return True, "2"
+
+    def gtp_known_command(self, args):
+        return True, "true" if len(args) > 0 and args[0] in self.commands else "false"
+
+    def gtp_list_commands(self, args):
+        return True, "\n".join(sorted(self.commands))
+
+    def gtp_quit(self, args):
+        self.finished = True
+        return True, ""
+
     def gtp_time(self, args):
         """
         Change the time per move allocated to the search agent (in units of secounds)
@@ -187,3 +421,102 @@ class GTPInterface:
             return True, "black"
         else:
             return True, "none"
+
+
+def respond(interface: GTPInterface, line: str):
+    """
+    Execute one line of the protocol and return the response to send back, in
+    the GTP format ("=[id] result" or "?[id] error" followed by an empty line),
+    or None for an empty or comment line.
+
+    """
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    words = line.split()
+    command_id = ''
+    if words[0].isdigit():
+        command_id = words.pop(0)
+        if not words:
+            return None
+    result = interface.send_command(' '.join(words))
+    success, message = result[0], result[1]
+    if success and words[0] in interface.STREAMING:
+        # the stream of the analysis follows and ends with the empty line
+        return '=' + command_id + '\n'
+    return ('=' if success else '?') + command_id + ' ' + message + '\n\n'
+
+
+def gtp_loop(interface: GTPInterface, infile, outfile) -> None:
+    """
+    Answer the commands read line by line from infile on outfile until quit is
+    received or the input ends.
+
+    """
+    lock = threading.Lock()
+
+    def write(text):
+        with lock:
+            outfile.write(text)
+            outfile.flush()
+
+    interface.finished = False
+    interface.write = write
+    for line in infile:
+        response = respond(interface, line)
+        if response is None:
+            continue
+        write(response)
+        interface.start_analysis()
+        if interface.finished:
+            break
+    interface.stop_analysis()
+    interface.write = None
+
+
+def serve_tcp(interface: GTPInterface, host: str, port: int) -> None:
+    """
+    Accept GTP connections on a TCP port, one controller at a time, each
+    starting from a cleared board of the shared engine.
+
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            interface.gtp_clear([])
+            infile = io.TextIOWrapper(self.rfile, encoding='utf-8')
+            outfile = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+            gtp_loop(interface, infile, outfile)
+            outfile.detach()
+
+    socketserver.TCPServer.allow_reuse_address = True
+    with socketserver.TCPServer((host, port), Handler) as server:
+        server.serve_forever()
+
+
+def main(argv: list = None) -> None:
+    """
+    Run the engine as a GTP program on stdin/stdout, or on a TCP port, e.g.
+
+        python gtp.py --agent RAVE --time 5
+        python gtp.py --agent QB-RAVE --port 5000
+
+    """
+    parser = argparse.ArgumentParser(description='HexPy GTP engine.')
+    parser.add_argument('--agent', default='UCT', help='agent name, see agents.py')
+    parser.add_argument('--time', type=float, default=10, help='seconds of search per move')
+    parser.add_argument('--size', type=int, default=8, help='initial board size')
+    parser.add_argument('--host', default='localhost', help='address to listen on with --port')
+    parser.add_argument('--port', type=int, help='serve GTP over TCP on this port instead of stdin/stdout')
+    args = parser.parse_args(argv)
+
+    interface = GTPInterface(args.agent, preload=True)
+    interface.move_time = args.time
+    interface.gtp_boardsize([args.size])
+    if args.port is None:
+        gtp_loop(interface, sys.stdin, sys.stdout)
+    else:
+        serve_tcp(interface, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
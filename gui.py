@@ -1,13 +1,13 @@
-from tkinter import (Frame, Canvas, ttk, HORIZONTAL, VERTICAL, IntVar, Scale, Button, Label, PhotoImage, BOTH, LEFT, Y,
-                     X, TOP, messagebox)
+from tkinter import (Frame, Canvas, ttk, HORIZONTAL, VERTICAL, IntVar, Scale, Button, Checkbutton, Label, PhotoImage,
+                     BOTH, LEFT, Y, X, TOP, messagebox)
+
+import threading
 
 from numpy import int_
 
 from gamestate import GameState
 from meta import GameMeta
-from rave_mctsagent import (RaveMctsAgent, LGRMctsAgent, PoolRaveMctsAgent, DecisiveMoveMctsAgent)
-from ucb1_tuned_mctsagent import UCB1TunedMctsAgent
-from uct_mcstsagent import UctMctsAgent
+from agents import AGENTS, make_agent
 
 
 class Gui:
@@ -20,25 +20,29 @@ class Gui:
 
     """
 
-    agent_type = {1: "UCT", 2: "RAVE", 3: "LAST-GOOD-REPLY", 4: "POOLRAVE", 5: "DECISIVE-MOVE", 6: "UCB1-TUNED"}
+    agent_type = dict(enumerate(AGENTS, 1))
+
+    AGENTS = AGENTS
 
-    AGENTS = {"UCT": UctMctsAgent,
-              "RAVE": RaveMctsAgent,
-              "LAST-GOOD-REPLY": LGRMctsAgent,
-              "POOLRAVE": PoolRaveMctsAgent,
-              "DECISIVE-MOVE": DecisiveMoveMctsAgent,
-              "UCB1-TUNED": UCB1TunedMctsAgent}
+    POLL_MS = 100  # how often the window checks on a running search
+    HEAT_INTERVAL = 0.2  # seconds between two snapshots of the root visits
+    # shades from the empty cell colour (gray1) to orange for the visit heatmap
+    HEAT = tuple('#%02x%02x%02x' % tuple(int(a + (b - a) * i / 9)
+                                         for a, b in zip((0x95, 0x89, 0x89), (0xee, 0x76, 0x00)))
+                 for i in range(10))
 
-    def __init__(self, root, agent_name='UCT'):
+    def __init__(self, root, agent_name='UCT', profile=False):
         self.root = root
         self.root.geometry('1366x690+0+0')
         self.agent_name = agent_name
+        self.profile = profile
         try:
-            self.agent = self.AGENTS[agent_name]()
+            self.agent = make_agent(agent_name)
         except KeyError:
             print("Unknown agent defaulting to basic")
-            self.agent_name = "uct"
-            self.agent = self.AGENTS[agent_name]()
+            self.agent_name = "UCT"
+            self.agent = make_agent(self.agent_name)
+        self.agent.set_profiling(self.profile)
         self.game = GameState(8)
         self.agent.set_gamestate(self.game)
         self.time = 1
@@ -58,6 +62,9 @@ class Gui:
         global BG
         BG = self.colors['gray2']
         self.last_move = None
+        self.search_thread = None  # background search of the bot move
+        self.heat = {}  # visits of every root child, written by the search thread
+        self.heat_colours = {}  # hexagon id -> heat colour it is filled with
         self.frame_board = Frame(self.root)  # main frame for the play board
         self.canvas = Canvas(self.frame_board, bg=BG)
         self.scroll_y = ttk.Scrollbar(self.frame_board, orient=VERTICAL)
@@ -77,6 +84,8 @@ class Gui:
 
         self.switch_agent_value = IntVar()  # defines which agent to play against
         self.switch_agent_value.set(1)
+        self.profile_value = IntVar()  # whether the search is profiled
+        self.profile_value.set(int(self.profile))
 
         self.game_turn_value.set(1)
         self.turn = {1: 'white', 2: 'black'}
@@ -85,25 +94,26 @@ class Gui:
         self.game_time = Scale(self.panel_game)
         self.game_turn = Scale(self.panel_game)
         self.generate = Button(self.panel_game)
+        self.cancel = Button(self.panel_game)
         self.reset_board = Button(self.panel_game)
 
         self.switch_agent = Scale(self.panel_game)
+        self.profile_check = Checkbutton(self.panel_game)
         self.agent_show = Label(self.panel_game, font=('Calibri', 14, 'bold'), fg='white', justify=LEFT,
                                 bg=BG, text='Agent Policy: ' + self.agent_name + '\n')
 
         self.hex_board = []
         # Holds the IDs of hexagons in the main board for implementing the click and play functions
+        self.cells = {}  # hexagon id -> cell (x, y) of the game it shows
         self.game_size_value.set(8)
         self.game_time_value.set(1)
         self.size = self.game_size_value.get()
         self.time = self.game_time_value.get()
         self.board = self.game.board
         self.board = int_(self.board).tolist()
-        self.gameboard2hexagons(self.board)  # building the game board
+        self.refresh()  # building the game board
         self.logo = PhotoImage(file='image/hex.png')
         self.uut_logo = PhotoImage(file='image/uut_2.png')
-        self.generate_black_edge()
-        self.generate_white_edge()
 
         # Frame_content
 
@@ -155,6 +165,10 @@ class Gui:
         self.switch_agent.configure(from_=1, to=len(self.agent_type), tickinterval=1, bg=BG, fg='white',
                                     orient=HORIZONTAL, variable=self.switch_agent_value, )
         self.switch_agent.pack(side=TOP, fill=X)
+        self.profile_check.configure(text='Profile search', font=('Calibri', 12, 'bold'), bg=BG, fg='white',
+                                     selectcolor=BG, activebackground=BG, activeforeground='white',
+                                     variable=self.profile_value, command=self.set_profiling)
+        self.profile_check.pack(side=TOP)
 
         #  ################################## MOVE LABELS ################################
         self.move_label = Label(self.panel_game, font=('Calibri', 15, 'bold'), height=5, fg='white', justify=LEFT,
@@ -162,13 +176,17 @@ class Gui:
         self.move_label.pack(side=TOP, fill=X)
 
         self.reset_board.configure(text='Reset Board', pady=10,
-                                   cursor='hand2', width=22,
+                                   cursor='hand2', width=14,
                                    font=('Calibri', 12, 'bold'))
         self.reset_board.pack(side=LEFT)
         self.generate.configure(text='Generate', pady=10,
-                                cursor='hand2', width=22,
+                                cursor='hand2', width=14,
                                 font=('Calibri', 12, 'bold'))
         self.generate.pack(side=LEFT)
+        self.cancel.configure(text='Cancel', pady=10,
+                              cursor='hand2', width=14,
+                              font=('Calibri', 12, 'bold'))
+        self.cancel.pack(side=LEFT)
 
         """
         the left panel notebook ---> Developers
@@ -204,6 +222,7 @@ class Gui:
         self.game_size.bind('<ButtonRelease>', self.set_size)
         self.game_time.bind('<ButtonRelease>', self.set_time)
         self.generate.bind('<ButtonRelease>', self.click_to_bot_play)
+        self.cancel.bind('<ButtonRelease>', self.cancel_search)
         self.reset_board.bind('<ButtonRelease>', self.reset)
         self.switch_agent.bind('<ButtonRelease>', self.set_agent)
 
@@ -383,68 +402,47 @@ class Gui:
         assigned color.
 
         """
-        if self.winner() == 'none':
-            x = self.canvas.canvasx(event.x)
-            y = self.canvas.canvasy(event.y)
-            idd = self.canvas.find_overlapping(x, y, x, y)
-            idd = list(idd)
-            if len(idd) is not 0:
-                clicked_cell = idd[0]
-                if any([clicked_cell in x for x in self.hex_board]):
-                    coordinated_cell = clicked_cell - self.hex_board[0][0]
-                    col = (coordinated_cell % self.size)
-                    turn = self.turn[self.game_turn_value.get()]
-                    if coordinated_cell % self.size == 0:
-                        row = int(coordinated_cell / self.size)
-                    else:
-                        row = int(coordinated_cell / self.size)
-                        cell = str(chr(65 + row)) + str(col + 1)
-                        self.move_label.configure(text=str(turn) + ' played ' + cell, justify=LEFT, height=5)
-                    if self.board[row][col] == 0:
-                        self.board[row][col] = self.game_turn_value.get()
-                        if self.game_turn_value.get() == 1:
-                            self.game_turn_value.set(2)
-                        else:
-                            self.game_turn_value.set(1)
-                    self.refresh()
-                    y = row
-                    x = col
-                    if turn[0].lower() == 'w':
-                        self.last_move = (x, y)
-                        if self.game.turn() == GameMeta.PLAYERS["white"]:
-                            self.game.play((x, y))
-                            self.agent.move((x, y))
-                            if self.winner() != 'none':
-                                messagebox.showinfo(" GAME OVER", " Wow, You won! \n Winner is %s" % self.winner())
-                            return
-                        else:
-                            self.game.place_white((x, y))
-                            self.agent.set_gamestate(self.game)
-                            if self.winner() != 'none':
-                                messagebox.showinfo(" GAME OVER", " Wow, You won! \n Winner is %s" % self.winner())
-                            return
-                    elif turn[0].lower() == 'b':
-                        self.last_move = (x, y)
-                        if self.game.turn() == GameMeta.PLAYERS["black"]:
-                            self.game.play((x, y))
-                            self.agent.move((x, y))
-                            if self.winner() != 'none':
-                                messagebox.showinfo(" GAME OVER", " Wow, You won! \n Winner is %s" % self.winner())
-                            return
-                        else:
-                            self.game.place_black((x, y))
-                            self.agent.set_gamestate(self.game)
-                            if self.winner() != 'none':
-                                messagebox.showinfo(" GAME OVER", " Wow, You won! \n Winner is %s" % self.winner())
-                            return
-        else:
+        if self.search_thread is not None:
+            return
+        if self.winner() != 'none':
             messagebox.showinfo(" GAME OVER ", " The game is already over! Winner is %s" % self.winner())
+            return
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        cells = [self.cells[item] for item in self.canvas.find_overlapping(x, y, x, y) if item in self.cells]
+        if len(cells) == 0:
+            return
+        x, y = cells[0]
+        if self.board[y][x] != 0:
+            return
+        turn = self.turn[self.game_turn_value.get()]
+        self.move_label.configure(text=str(turn) + ' played ' + chr(65 + y) + str(x + 1), justify=LEFT, height=5)
+        self.board[y][x] = self.game_turn_value.get()
+        self.set_cell((x, y), self.game_turn_value.get())
+        if self.game_turn_value.get() == 1:
+            self.game_turn_value.set(2)
+        else:
+            self.game_turn_value.set(1)
+        self.last_move = (x, y)
+        player = GameMeta.PLAYERS["white"] if turn[0].lower() == 'w' else GameMeta.PLAYERS["black"]
+        if self.game.turn() == player:
+            self.game.play((x, y))
+            self.agent.move((x, y))
+        else:
+            if player == GameMeta.PLAYERS["white"]:
+                self.game.place_white((x, y))
+            else:
+                self.game.place_black((x, y))
+            self.agent.set_gamestate(self.game)
+        if self.winner() != 'none':
+            messagebox.showinfo(" GAME OVER", " Wow, You won! \n Winner is %s" % self.winner())
 
     def set_size(self, event):
         """
         It changes the board size and reset the whole game.
 
         """
+        self.stop_search()
         self.canvas.delete('all')
         self.size = self.game_size_value.get()
         self.game = GameState(self.size)
@@ -469,9 +467,23 @@ class Gui:
         It changes the time for CPU player to think and generate a move.
 
         """
+        self.stop_search()
         agent_num = self.switch_agent_value.get()
         self.agent_name = self.agent_type[agent_num]
-        self.agent = self.AGENTS[self.agent_name](self.game)
+        self.agent = make_agent(self.agent_name, self.game)
+        self.agent.set_profiling(self.profile)
+        self.agent_show.config(font=('Calibri', 14, 'bold'), justify=LEFT,
+                               text='Agent Policy: ' + self.agent_name + '\n')
+
+    def set_profiling(self) -> None:
+        """
+        Switch the search profiler on or off as the checkbox says. The phase
+        timings are shown under the agent name after the next bot move.
+
+        """
+        self.stop_search()
+        self.profile = bool(self.profile_value.get())
+        self.agent.set_profiling(self.profile)
         self.agent_show.config(font=('Calibri', 14, 'bold'), justify=LEFT,
                                text='Agent Policy: ' + self.agent_name + '\n')
 
@@ -491,45 +503,152 @@ class Gui:
         """
         By pushing the generate button, It produces an appropriate move
         by using monte carlo tree search algorithm for the player which
-        turn is his/hers! .
+        turn is his/hers! . The search runs in a background thread so the
+        window stays responsive; its progress is polled with root.after.
 
         """
+        if self.search_thread is not None:
+            return
         if self.winner() == 'none':
-            self.agent.search(self.time)
-            num_rollouts, node_count, run_time = self.agent.statistics()
-            move = self.agent.best_move()  # the move is tuple like (3, 1)
-            self.game.play(move)
-            self.agent.move(move)
-            row, col = move  # Relating the 'move' tuple with index of self.board
-            self.board[col][row] = self.game_turn_value.get()
-            if self.game_turn_value.get() == 1:  # change the turn of players
-                self.game_turn_value.set(2)
-            else:
-                self.game_turn_value.set(1)
-            self.refresh()
-            player = self.turn[self.game_turn_value.get()]
-            cell = chr(ord('A') + move[1]) + str(move[0] + 1)
+            self.heat = {}
+            self.search_thread = threading.Thread(target=self.agent.search,
+                                                  args=(self.time, self.record_heat, self.HEAT_INTERVAL),
+                                                  daemon=True)
+            self.search_thread.start()
             self.move_label.config(font=('Calibri', 15, 'bold'), justify='left',
-                                   text=str(num_rollouts) + ' Game Simulations ' + '\n'
-                                                          + 'In ' + str(run_time) + ' seconds ' + '\n'
-                                                          + 'Node Count : ' + str(node_count) + '\n'
-                                                          + player + ' played at ' + cell, height=5)
-            print('move = ', cell)
-            if self.winner() != 'none':
-                messagebox.showinfo(" GAME OVER", " Oops!\n You lost! \n Winner is %s" % self.winner())
+                                   text='Searching ...\nCLICK CANCEL TO PLAY NOW', height=5)
+            self.root.after(self.POLL_MS, self.poll_search)
         else:
             messagebox.showinfo(" GAME OVER", " The game is already over! Winner is %s" % self.winner())
 
+    def record_heat(self, agent) -> None:
+        """
+        Search callback, runs in the search thread: take a snapshot of the visits
+        of the root children for the heatmap.
+
+        """
+        self.heat = {child.move: child.N for child in agent.root.children.values()}
+
+    def poll_search(self) -> None:
+        """
+        Update the heatmap while the search runs and play its move once it ends.
+
+        """
+        if self.search_thread is None:
+            return
+        self.show_heat(self.heat)
+        if self.search_thread.is_alive():
+            self.root.after(self.POLL_MS, self.poll_search)
+            return
+        self.search_thread = None
+        # a cancel may have arrived after the search ended on its own
+        self.agent.interrupted = False
+        self.clear_heat()
+        self.play_bot_move()
+
+    def cancel_search(self, event) -> None:
+        """
+        Cut the running search short, the bot then plays the best move found so far.
+
+        """
+        if self.search_thread is not None:
+            self.agent.interrupt()
+
+    def stop_search(self) -> None:
+        """
+        End the running search without playing its move.
+
+        """
+        if self.search_thread is not None:
+            self.agent.interrupt()
+            self.search_thread.join()
+            self.search_thread = None
+            self.agent.interrupted = False
+            self.clear_heat()
+
+    def show_heat(self, heat: dict) -> None:
+        """
+        Colour the empty cells by the visits of their root child, changing only
+        the hexagons whose shade differs from the one they already have.
+
+        """
+        if not heat:
+            return
+        most = max(heat.values()) or 1
+        for (x, y), visits in heat.items():
+            if self.board[y][x] != 0:
+                continue
+            item = self.hex_board[y][x]
+            colour = self.HEAT[visits * (len(self.HEAT) - 1) // most]
+            if self.heat_colours.get(item) != colour:
+                self.canvas.itemconfig(item, fill=colour)
+                self.heat_colours[item] = colour
+
+    def clear_heat(self) -> None:
+        """
+        Give the hexagons coloured by the heatmap their empty colour back.
+
+        """
+        for item in self.heat_colours:
+            self.canvas.itemconfig(item, fill=self.colors['gray1'])
+        self.heat_colours.clear()
+
+    def play_bot_move(self) -> None:
+        """
+        Play the best move of the finished search and show its statistics.
+
+        """
+        num_rollouts, node_count, run_time, profile = self.agent.statistics()
+        move = self.agent.best_move()  # the move is tuple like (3, 1)
+        self.game.play(move)
+        self.agent.move(move)
+        row, col = move  # Relating the 'move' tuple with index of self.board
+        self.board[col][row] = self.game_turn_value.get()
+        self.set_cell(move, self.game_turn_value.get())
+        if self.game_turn_value.get() == 1:  # change the turn of players
+            self.game_turn_value.set(2)
+        else:
+            self.game_turn_value.set(1)
+        player = self.turn[self.game_turn_value.get()]
+        cell = chr(ord('A') + move[1]) + str(move[0] + 1)
+        self.move_label.config(font=('Calibri', 15, 'bold'), justify='left',
+                               text=str(num_rollouts) + ' Game Simulations ' + '\n'
+                                                      + 'In ' + str(run_time) + ' seconds ' + '\n'
+                                                      + 'Node Count : ' + str(node_count) + '\n'
+                                                      + player + ' played at ' + cell, height=5)
+        if profile is not None:
+            self.agent_show.config(text='Agent Policy: ' + self.agent_name + '\n' + str(self.agent.profiler))
+        print('move = ', cell)
+        if self.winner() != 'none':
+            messagebox.showinfo(" GAME OVER", " Oops!\n You lost! \n Winner is %s" % self.winner())
+
     def refresh(self):
         """
-        Delete the whole world and recreate it again
+        Delete the whole world and recreate it again. This only runs when the
+        board size changes or the board is reset, moves recolour their hexagon
+        with set_cell.
 
         """
         self.canvas.delete('all')
         self.hex_board.clear()
+        self.heat_colours.clear()
         self.gameboard2hexagons(self.board)
         self.generate_black_edge()
         self.generate_white_edge()
+        self.cells = {item: (x, y) for y, row in enumerate(self.hex_board) for x, item in enumerate(row)}
+
+    def set_cell(self, cell: tuple, player: int) -> None:
+        """
+        Recolour the hexagon of the passed cell (x, y) for the passed player
+        (0 for an empty cell).
+
+        """
+        item = self.hex_board[cell[1]][cell[0]]
+        self.heat_colours.pop(item, None)
+        if player == 0:
+            self.canvas.itemconfig(item, fill=self.colors['gray1'], activefill='cyan')
+        else:
+            self.canvas.itemconfig(item, fill=self.colors['white' if player == 1 else 'black'], activefill='')
 
     def reset(self, event):
         """
@@ -537,6 +656,7 @@ class Gui:
         for a new game
 
         """
+        self.stop_search()
         self.game = GameState(self.game.size)
         self.agent.set_gamestate(self.game)
         self.set_size(event)
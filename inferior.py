@@ -0,0 +1,173 @@
+from itertools import product
+
+from meta import GameMeta
+from gamestate import GameState
+
+# codes used for the six neighbors of a cell, board edges take the color of the player they belong to
+EMPTY, WHITE, BLACK = GameMeta.PLAYERS['none'], GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+
+
+def _useless(ring: tuple, color: int) -> bool:
+    """
+    Return True if a stone of the passed color on the center of the ring can never
+    connect two neighbors that are not already connected around the ring, that is
+    every pair of neighbors which may end up with this color is joined by an arc of
+    stones of this color.
+
+    Args:
+        ring (tuple): colors of the six neighbors in cyclic order
+        color (int): the color to check
+    """
+    potential = [i for i in range(6) if ring[i] in (EMPTY, color)]
+    for p in potential:
+        for q in potential:
+            if p >= q:
+                continue
+            inner = range(p + 1, q)
+            outer = [i % 6 for i in range(q + 1, p + 6)]
+            if not (all(ring[i] == color for i in inner) or all(ring[i] == color for i in outer)):
+                return False
+    return True
+
+
+def _build_patterns() -> list:
+    """
+    Precompute for each of the 3 ** 6 neighborhoods whether the center cell is
+    useless for white and/or for black. The pattern code of a ring is the base 3
+    number formed by its colors.
+    """
+    patterns = []
+    for ring in product((EMPTY, WHITE, BLACK), repeat=6):
+        patterns.append((_useless(ring, WHITE), _useless(ring, BLACK)))
+    # product enumerates the rings with the first neighbor as the most significant digit
+    return patterns
+
+
+PATTERNS = _build_patterns()
+_GEOMETRY = {}
+
+
+def ring_geometry(size: int) -> list:
+    """
+    Return, for every cell of a board of the passed size, its six neighbors in
+    cyclic order. Off-board neighbors are given as the color of the edge they lie
+    on, or as empty beyond a corner where the edge is ambiguous.
+
+    Args:
+        size (int): The board size
+    """
+    if size not in _GEOMETRY:
+        geometry = {}
+        for x in range(size):
+            for y in range(size):
+                ring = []
+                for dx, dy in GameMeta.NEIGHBOR_RING:
+                    nx, ny = x + dx, y + dy
+                    x_inside = 0 <= nx < size
+                    y_inside = 0 <= ny < size
+                    if x_inside and y_inside:
+                        ring.append((nx, ny))
+                    elif y_inside:
+                        ring.append(WHITE)
+                    elif x_inside:
+                        ring.append(BLACK)
+                    else:
+                        ring.append(EMPTY)
+                geometry[(x, y)] = ring
+        _GEOMETRY[size] = geometry
+    return _GEOMETRY[size]
+
+
+def classify(board, size: int, cell: tuple) -> tuple:
+    """
+    Look up the precomputed pattern of an empty cell.
+
+    Args:
+        board: the board array of a game state (or a copy of it)
+        size (int): The board size
+        cell (tuple): row and column of the cell
+
+    Returns:
+        tuple: whether the cell is useless for white and whether it is useless for
+               black; a cell useless for both is dead
+    """
+    code = 0
+    for n in ring_geometry(size)[cell]:
+        code = code * 3 + (board[n] if type(n) is tuple else n)
+    return PATTERNS[code]
+
+
+def _dead(board, size: int, cell: tuple) -> bool:
+    useless_white, useless_black = classify(board, size, cell)
+    return useless_white and useless_black
+
+
+def _captured(board, size: int, a: tuple, b: tuple, color: int) -> bool:
+    """
+    Return True if the pair of adjacent empty cells is captured by color: whichever
+    of the two the opponent takes, answering on the other one leaves it dead.
+    """
+    board[b] = color
+    a_dead = _dead(board, size, a)
+    board[b] = EMPTY
+    if not a_dead:
+        return False
+    board[a] = color
+    b_dead = _dead(board, size, b)
+    board[a] = EMPTY
+    return b_dead
+
+
+def inferior_cells(state: GameState) -> dict:
+    """
+    Find the empty cells that cannot affect the outcome of the game. Dead cells and
+    captured pairs are filled in on a copy of the board as they are found, which
+    may expose more of them, until no pattern matches any more.
+
+    Returns:
+        dict: 'dead' cells can be given any color, 'white' and 'black' cells are
+              captured by that player and can be filled with its stones
+    """
+    size = state.size
+    board = state.board.copy()
+    result = {'dead': [], 'white': [], 'black': []}
+    names = {WHITE: 'white', BLACK: 'black'}
+    changed = True
+    while changed:
+        changed = False
+        for cell in ring_geometry(size):
+            if board[cell] != EMPTY:
+                continue
+            if _dead(board, size, cell):
+                # the color of a dead cell does not matter, any fill in is fine
+                board[cell] = WHITE
+                result['dead'].append(cell)
+                changed = True
+                continue
+            for n in ring_geometry(size)[cell]:
+                if type(n) is not tuple or n < cell or board[n] != EMPTY:
+                    continue
+                for color in (WHITE, BLACK):
+                    if _captured(board, size, cell, n, color):
+                        board[cell] = board[n] = color
+                        result[names[color]].extend((cell, n))
+                        changed = True
+                        break
+                if board[cell] != EMPTY:
+                    break
+    return result
+
+
+def pruned_moves(state: GameState) -> list:
+    """
+    Return the moves worth searching in the passed state. A stone on a dead cell is
+    no better than passing, which is never better than any move in hex, and a stone
+    in a captured pair is either the same (for its owner) or answered by the owner
+    restoring the position (for the opponent). If every move is inferior all moves
+    are returned.
+    """
+    moves = state.moves()
+    inferior = inferior_cells(state)
+    skipped = set(inferior['dead'] + inferior['white'] + inferior['black'])
+    pruned = [move for move in moves if move not in skipped]
+    return pruned if pruned else moves
@@ -1,11 +1,15 @@
+import argparse
 from tkinter import Tk
 
 from gui import Gui
 
 
-def main():
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='HexPy game window.')
+    parser.add_argument('--profile', action='store_true', help='show the search profile after every bot move')
+    args = parser.parse_args(argv)
     root = Tk()
-    interface = Gui(root)
+    interface = Gui(root, profile=args.profile)
     root.mainloop()
 
 
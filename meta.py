@@ -4,9 +4,24 @@ class MCTSMeta:
     RAVE_CONST = 300
     RANDOMNESS = 0.5
     POOLRAVE_CAPACITY = 10
+    POOLRAVE_REFRESH = 20
     K_CONST = 10
     A_CONST = 0.25
     WARMUP_ROLLOUTS = 7
+    QB_WINDOW = 0
+    QB_DECAY = 0.0
+    SOLVER_THRESHOLD = 8
+    # leaving dead and captured cells out of expand narrows the tree but rescans
+    # the whole board on every expansion (about 1.7 ms on 8x8, 4 ms on 13x13),
+    # which costs more rollouts than it saves at short time controls
+    PRUNE_INFERIOR = False
+    RANDOM_BATCH = 4096
+    # disable the process-wide cyclic collector during time-bounded searches
+    PAUSE_GC = False
+    PROGRESSIVE_WIDENING = False
+    WIDENING_CONST = 1.0
+    WIDENING_EXPONENT = 0.5
+    BIAS_CONST = 0.5
 
 
 class GameMeta:
@@ -16,6 +31,7 @@ class GameMeta:
     EDGE1 = 1
     EDGE2 = 2
     NEIGHBOR_PATTERNS = ((-1, 0), (0, -1), (-1, 1), (0, 1), (1, 0), (1, -1))
+    NEIGHBOR_RING = ((-1, 0), (-1, 1), (0, 1), (1, 0), (1, -1), (0, -1))
 
 
 
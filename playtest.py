@@ -1,11 +1,16 @@
-from gui import (UctMctsAgent, RaveMctsAgent)
-from gtp import GTPInterface
-from tournament import tournament
+import os
 
+from sprt import SPRT
+from tournament import tournament, print_progress
+
+agent1 = 'UCT'
+agent2 = 'RAVE'
 game_number = 100
 move_time = 1
 boardsize = 11
 opening_moves = []
+workers = None  # all cores
+elo_bounds = (0, 50)  # SPRT hypotheses, None plays all the games
 
 
 def main():
@@ -13,29 +18,34 @@ def main():
     Run a tournament between two agents and print the resulting winrate
     for the first agent.
     """
-    interface1 = GTPInterface(UctMctsAgent())
-    interface2 = GTPInterface(RaveMctsAgent())
     address = 'results/result.txt'
+    os.makedirs('results', exist_ok=True)
     f = open(address, 'a')
-    f.write('Tournament between QB UCTRAVE , UCT \n')
-    print('Tournament between QB RAVE , UCT \n')
+    f.write('Tournament between %s , %s \n' % (agent1, agent2))
+    print('Tournament between %s , %s \n' % (agent1, agent2))
     f.close()
     for i in range(3):
-        result = tournament(interface1, interface2, game_number, move_time, boardsize, opening_moves)
+        sprt = SPRT(*elo_bounds) if elo_bounds is not None else None
+        result = tournament(agent1, agent2, game_number, move_time, boardsize, opening_moves, workers,
+                            callback=print_progress, sprt=sprt, log='results/tournament_%d.jsonl' % i)
+        print('player 1 wins = ', result['p1_rate'] * 100, ' %')
+        print('player 2 wins = ', (1 - result['p1_rate']) * 100, ' %')
+        print('Elo = %.1f [%.1f, %.1f]  LOS = %.1f %%' % (result['elo'] + (result['los'] * 100,)))
+        print('Finished in %i seconds' % result['elapsed'])
         with open(address, 'a') as file:
             file.write('Result of tournament %a \n' % i)
-            file.write('player 1 wins = %a games \n' % result[0])
-            file.write('player 2 wins = %a games \n' % result[1])
-            file.write("Simulations : \nAvg [ %a ] max = [ %a ] min = [ %a ] \n" % result[2])
-            file.write("Total time : %a \n\n\n" % result[3])
-            file.close()
+            file.write('player 1 wins = %a games \n' % result['p1_score'])
+            file.write('player 2 wins = %a games \n' % result['p2_score'])
+            file.write('Elo = %.1f [%.1f, %.1f] LOS = %.3f \n' % (result['elo'] + (result['los'],)))
+            if result['verdict'] is not None:
+                file.write('SPRT %s after %a games \n' % (result['verdict'], result['games']))
+            file.write("Simulations : \nAvg [ %a ] max = [ %a ] min = [ %a ] \n" % result['rollouts'])
+            file.write("Total time : %a \n\n\n" % result['elapsed'])
 
 
 def shutdown():
-    import os
     os.system("shutdown /s /t 90")
 
 
 if __name__ == "__main__":
     main()
-    # shutdown()
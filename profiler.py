@@ -0,0 +1,147 @@
+from time import perf_counter as clock
+
+
+class SearchProfiler:
+    """
+    Notes:
+        Per-phase timing and counters of the search loop of one agent. attach()
+        shadows the phase methods of the agent instance with timed wrappers and
+        detach() removes them again, so an agent without a profiler runs its
+        plain methods and pays nothing for it. The time of the nested phases (the
+        copy of the root state and expand) and of the tie counting is taken out
+        of the select time.
+
+    Attributes:
+        times (dict): cumulative seconds spent in each phase of PHASES
+        selections (int): number of select_node calls
+        depth (int): sum of the depths of the selected nodes
+        playouts (int): number of rollouts
+        playout_moves (int): sum of the number of moves played in the rollouts
+        expansions (int): number of expand calls
+        choices (int): number of select_child calls
+        ties (int): number of select_child calls with several best children
+        elapsed (float): run time of the search the counters belong to
+        overhead (float): seconds spent counting ties, left out of the select time
+    """
+    PHASES = ('select', 'copy', 'expand', 'rollout', 'backup')
+    WRAPPED = ('select_node', 'copy_root_state', 'expand', 'roll_out', 'backup', 'select_child')
+
+    def __init__(self) -> None:
+        self.times = {}
+        self.selections = 0
+        self.depth = 0
+        self.playouts = 0
+        self.playout_moves = 0
+        self.expansions = 0
+        self.choices = 0
+        self.ties = 0
+        self.elapsed = 0.0
+        self.overhead = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clear the timers and the counters.
+        """
+        self.times = {phase: 0.0 for phase in self.PHASES}
+        self.selections = self.depth = 0
+        self.playouts = self.playout_moves = 0
+        self.expansions = self.choices = self.ties = 0
+        self.elapsed = self.overhead = 0.0
+
+    def attach(self, agent) -> None:
+        """
+        Start profiling the passed agent.
+        """
+        self.detach(agent)
+        select_node, copy_root_state, expand = agent.select_node, agent.copy_root_state, agent.expand
+        roll_out, backup, select_child = agent.roll_out, agent.backup, agent.select_child
+
+        def timed_select_node():
+            inner = self.times['copy'] + self.times['expand'] + self.overhead
+            start = clock()
+            node, state = select_node()
+            elapsed = clock() - start
+            self.times['select'] += elapsed - (self.times['copy'] + self.times['expand'] + self.overhead - inner)
+            self.selections += 1
+            parent = node
+            while parent is not agent.root and parent.parent is not None:
+                parent = parent.parent
+                self.depth += 1
+            return node, state
+
+        def timed_copy_root_state():
+            start = clock()
+            state = copy_root_state()
+            self.times['copy'] += clock() - start
+            return state
+
+        def timed_expand(parent, state):
+            start = clock()
+            result = expand(parent, state)
+            self.times['expand'] += clock() - start
+            self.expansions += 1
+            return result
+
+        def timed_roll_out(state):
+            played = state.white_played + state.black_played
+            start = clock()
+            winner = roll_out(state)
+            self.times['rollout'] += clock() - start
+            self.playouts += 1
+            self.playout_moves += state.white_played + state.black_played - played
+            return winner
+
+        def timed_backup(node, turn, outcome, state=None):
+            start = clock()
+            backup(node, turn, outcome, state)
+            self.times['backup'] += clock() - start
+
+        def counted_select_child(node, children):
+            child = select_child(node, children)
+            start = clock()
+            values = [n.value for n in children]
+            self.choices += 1
+            if values.count(max(values)) > 1:
+                self.ties += 1
+            self.overhead += clock() - start
+            return child
+
+        agent.select_node = timed_select_node
+        agent.copy_root_state = timed_copy_root_state
+        agent.expand = timed_expand
+        agent.roll_out = timed_roll_out
+        agent.backup = timed_backup
+        agent.select_child = counted_select_child
+
+    def detach(self, agent) -> None:
+        """
+        Stop profiling the passed agent, restoring its plain methods.
+        """
+        for name in self.WRAPPED:
+            agent.__dict__.pop(name, None)
+
+    def report(self) -> dict:
+        """
+        Return the timers and the derived averages.
+
+        Returns:
+            dict: seconds per phase, average playout length, average selection
+                  depth, expansions per second and the rate of ties in selection
+        """
+        result = {phase + '_time': self.times[phase] for phase in self.PHASES}
+        result['playout_length'] = self.playout_moves / self.playouts if self.playouts else 0.0
+        result['selection_depth'] = self.depth / self.selections if self.selections else 0.0
+        result['expansions_per_sec'] = self.expansions / self.elapsed if self.elapsed else 0.0
+        result['tie_rate'] = self.ties / self.choices if self.choices else 0.0
+        return result
+
+    def __str__(self) -> str:
+        report = self.report()
+        return ('select %.2fs copy %.2fs expand %.2fs\n'
+                'rollout %.2fs backup %.2fs\n'
+                'playout length %.1f depth %.1f\n'
+                'expansions/s %.0f ties %.1f%%'
+                % (report['select_time'], report['copy_time'], report['expand_time'], report['rollout_time'],
+                   report['backup_time'], report['playout_length'], report['selection_depth'],
+                   report['expansions_per_sec'], report['tie_rate'] * 100))
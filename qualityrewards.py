@@ -0,0 +1,93 @@
+from math import exp
+
+from gamestate import GameState
+from meta import GameMeta, MCTSMeta
+from randomstream import RandomStream
+from runningstats import RunningStats
+
+
+class QualityRewards:
+    """
+    Notes:
+        Quality-based rewards as a backup layer which can be attached to any
+        agent. After each simulation the layer is shown the final state of the
+        playout; it updates the running playout length statistics of both
+        players in O(1) and works out the bonus of each player once. The backup
+        of the agent then passes every node reward through reward().
+
+    Attributes:
+        rng (RandomStream): random stream of the agent, used for the initial guess
+        pl_stats (dict): running statistics of the playout length of each player,
+                         see MCTSMeta.QB_WINDOW and MCTSMeta.QB_DECAY
+        bonus (dict): bonus of each player for the current simulation
+    """
+
+    def __init__(self, rng: RandomStream, state: GameState) -> None:
+        self.rng = rng
+        self.pl_stats = {}
+        self.bonus = {GameMeta.PLAYERS['white']: 0.0, GameMeta.PLAYERS['black']: 0.0}
+        self.reset(state)
+
+    def reset(self, state: GameState) -> None:
+        """
+        Start the playout length statistics again from a random guess based on
+        the number of empty cells of the passed root state.
+        """
+        moves_number, size = len(state.moves()), state.size
+        initial_member = self.rng.randint(moves_number // size, moves_number // 2)
+        self.pl_stats = {'white': RunningStats(MCTSMeta.QB_WINDOW, MCTSMeta.QB_DECAY),
+                         'black': RunningStats(MCTSMeta.QB_WINDOW, MCTSMeta.QB_DECAY)}
+        self.pl_stats['white'].push(initial_member)
+        self.pl_stats['black'].push(initial_member)
+
+    def modify_reward(self, pl_length: list) -> dict:
+        """
+        Takes the simulation length as the input and modifies it based on the
+        Quality-Based rewards
+
+        Args:
+            pl_length: number of moves played by white and black in the simulation
+
+        Returns:
+            dict: Bonus added reward based on quality based rewards
+
+        """
+        result = {}
+        for player, length in zip(('white', 'black'), pl_length):
+            stats = self.pl_stats[player]
+            deviation = stats.std
+            landa = (stats.mean - length) / deviation if deviation != 0 else 0
+            result[player] = -1 + (2 / (1 + exp(-MCTSMeta.K_CONST * landa)))
+        return result
+
+    def observe(self, state: GameState = None) -> None:
+        """
+        Record the length of the simulation which ended in the passed state and
+        compute the bonus used by the following backup. Passing None (no playout
+        was run, e.g. for a solved node) backs up plain rewards.
+        """
+        white, black = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+        if state is None:
+            self.bonus[white] = self.bonus[black] = 0.0
+            return
+        pl_length = [state.white_played, state.black_played]
+        self.pl_stats['white'].push(pl_length[0])
+        self.pl_stats['black'].push(pl_length[1])
+        if max(pl_length) >= MCTSMeta.WARMUP_ROLLOUTS:
+            bonus = self.modify_reward(pl_length)
+            self.bonus[white], self.bonus[black] = bonus['white'], bonus['black']
+        else:
+            self.bonus[white] = self.bonus[black] = 0.0
+
+    def reward(self, reward: float, player: int) -> float:
+        """
+        Return the quality-based reward of the passed player for the current
+        simulation. The bonus scales the reward away from zero, so the reward
+        must be signed: 1 for a win and -1 for a loss. Backups on a 0/1 scale
+        map the reward to the signed scale and the result back.
+
+        Args:
+            reward: plain reward of the player, 1 or -1
+            player: the player who receives the reward
+        """
+        return reward + reward * MCTSMeta.A_CONST * self.bonus[player]
@@ -0,0 +1,74 @@
+from numpy.random import SeedSequence, default_rng
+
+from meta import MCTSMeta
+
+
+class RandomStream:
+    """
+    Notes:
+        Random number stream owned by a single agent. Integers are drawn from a
+        numpy Generator in batches and handed out one at a time, which is much
+        cheaper per call than asking the generator every time, and seeding the
+        stream makes a search reproducible. Independent, non-overlapping streams
+        for parallel workers are made with spawn.
+
+    Attributes:
+        seed_sequence (SeedSequence): entropy the stream was created from
+        generator (Generator): numpy generator filling the buffer
+        batch (int): how many numbers are drawn at once
+        buffer (list): pre-drawn 32 bit integers
+        position (int): index of the next unused number in the buffer
+    """
+    SCALE = 2 ** 32
+
+    def __init__(self, seed=None, batch: int = MCTSMeta.RANDOM_BATCH) -> None:
+        """
+        Args:
+            seed: int, SeedSequence or None for fresh entropy
+            batch (int): how many numbers are drawn at once
+        """
+        self.seed_sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.generator = default_rng(self.seed_sequence)
+        self.batch = batch
+        self.buffer = []
+        self.position = 0
+
+    def _next(self) -> int:
+        if self.position == len(self.buffer):
+            self.buffer = self.generator.integers(0, self.SCALE, self.batch).tolist()
+            self.position = 0
+        value = self.buffer[self.position]
+        self.position += 1
+        return value
+
+    def index(self, n: int) -> int:
+        """
+        Return a random index in range(n).
+        """
+        return self._next() % n
+
+    def choice(self, seq):
+        """
+        Return a random element of the passed non-empty sequence.
+        """
+        return seq[self._next() % len(seq)]
+
+    def random(self) -> float:
+        """
+        Return a random float in [0, 1).
+        """
+        return self._next() / self.SCALE
+
+    def randint(self, low: int, high: int) -> int:
+        """
+        Return a random integer in [low, high), or low if the range is empty.
+        """
+        if high <= low:
+            return low
+        return low + self._next() % (high - low)
+
+    def spawn(self, n: int) -> list:
+        """
+        Create n independent child streams, one for each parallel worker.
+        """
+        return [RandomStream(seed, self.batch) for seed in self.seed_sequence.spawn(n)]
@@ -1,14 +1,25 @@
+from array import array
 from math import sqrt, log
-from copy import deepcopy
-from random import choice, random
-from time import time as clock
 
-from gamestate import GameState
+from numpy import nonzero
+
+from gamestate import GameState, transform_cell
 from uct_mcstsagent import Node, UctMctsAgent
+from rollouts import DecisiveMoveRollout, LGRRollout, LGRFRollout, PoolRaveRollout
 from meta import *
 
 
 class RaveNode(Node):
+    """
+    Node for the RAVE search.
+
+    Attributes:
+        amaf_q (array): Q_RAVE of the untried moves of the node, by cell index
+                        x * size + y, None once every move has its child
+        amaf_n (array): N_RAVE of the untried moves of the node, by cell index
+    """
+    __slots__ = ('amaf_q', 'amaf_n')
+
     def __init__(self, move=None, parent=None):
         """
         Initialize a new node with optional move and parent and initially empty
@@ -16,9 +27,12 @@ class RaveNode(Node):
 
         """
         super(RaveNode, self).__init__(move, parent)
+        self.amaf_q = None
+        self.amaf_n = None
 
     @property
-    def value(self, explore: float = MCTSMeta.EXPLORATION, rave_const: float = MCTSMeta.RAVE_CONST) -> float:
+    def value(self, explore: float = MCTSMeta.EXPLORATION, rave_const: float = MCTSMeta.RAVE_CONST,
+              bias: float = MCTSMeta.BIAS_CONST) -> float:
         """
         Calculate the UCT value of this node relative to its parent, the parameter
         "explore" specifies how much the value should favor nodes that have
@@ -26,396 +40,167 @@ class RaveNode(Node):
         rate.
         Currently explore is set to zero when choosing the best move to play so
         that the move with the highest win_rate is always chosen. When searching
-        explore is set to EXPLORATION specified above.
+        explore is set to EXPLORATION specified above. The progressive bias term
+        adds the prior of the move, fading as the node gets visits.
 
         """
         # unless explore is set to zero, maximally favor unexplored nodes
         if self.N == 0:
-            return 0 if explore is 0 else GameMeta.INF
+            return 0 if explore == 0 else GameMeta.INF
         else:
             # rave valuation:
             alpha = max(0, (rave_const - self.N) / rave_const)
             UCT = self.Q / self.N + explore * sqrt(2 * log(self.parent.N) / self.N)
-            AMAF = self.Q_RAVE / self.N_RAVE if self.N_RAVE is not 0 else 0
-            return (1 - alpha) * UCT + alpha * AMAF
+            AMAF = self.Q_RAVE / self.N_RAVE if self.N_RAVE != 0 else 0
+            return (1 - alpha) * UCT + alpha * AMAF + bias * self.prior / (self.N + 1)
 
 
 class RaveMctsAgent(UctMctsAgent):
+    """
+    MCTS agent which mixes the UCT value with the all-moves-as-first (AMAF)
+    value of the moves while they have few visits.
 
-    def __init__(self, state: GameState = GameState(8)):
-        self.root_state = deepcopy(state)
-        self.root = RaveNode()
-        self.run_time = 0
-        self.node_count = 0
-        self.num_rollouts = 0
+    """
+    node_class = RaveNode
+    signed_rewards = True
 
-    def set_gamestate(self, state: GameState) -> None:
+    @staticmethod
+    def rank(child: RaveNode) -> tuple:
         """
-        Set the root_state of the tree to the passed gamestate, this clears all
-        the information stored in the tree since none of it applies to the new
-        state.
+        Order the children for widening by their AMAF value, then by prior.
+        Moves never seen in a playout come last.
         """
-        self.root_state = deepcopy(state)
-        self.root = RaveNode()
+        return child.Q_RAVE / child.N_RAVE if child.N_RAVE else -1.0, child.prior
 
-    def move(self, move: tuple) -> None:
-        """
-        Make the passed move and update the tree appropriately. It is
-        designed to let the player choose an action manually (which might
-        not be the best action).
-        Args:
-            move:
+    def expand(self, parent: RaveNode, state: GameState) -> bool:
         """
-        if move in self.root.children:
-            child = self.root.children[move]
-            child.parent = None
-            self.root = child
-            self.root_state.play(child.move)
-            return
-
-        # if for whatever reason the move is not in the children of
-        # the root just throw out the tree and start over
-        self.root_state.play(move)
-        self.root = RaveNode()
+        Expand the node as UctMctsAgent.expand does. The AMAF statistics of its
+        untried moves are kept in two arrays of the node until their children
+        are created.
 
-    def search(self, time_budget: int) -> None:
-        """
-        Search and update the search tree for a specified amount of time in secounds.
-        """
-        start_time = clock()
-        num_rollouts = 0
-
-        # do until we exceed our time budget
-        while clock() - start_time < time_budget:
-            node, state = self.select_node()
-            turn = state.turn()
-            outcome, black_rave_pts, white_rave_pts = self.roll_out(state)
-            self.backup(node, turn, outcome, black_rave_pts, white_rave_pts)
-            num_rollouts += 1
-        run_time = clock() - start_time
-        node_count = self.tree_size()
-        self.run_time = run_time
-        self.node_count = node_count
-        self.num_rollouts = num_rollouts
-
-    def select_node(self) -> tuple:
         """
-        Select a node in the tree to preform a single simulation from.
-        """
-        node = self.root
-        state = deepcopy(self.root_state)
-
-        # stop if we reach a leaf node
-        while len(node.children) != 0:
-            max_value = max(node.children.values(),
-                            key=lambda n:
-                            n.value).value
-            # descend to the maximum value node, break ties at random
-            max_nodes = [n for n in node.children.values() if
-                         n.value == max_value]
-            node = choice(max_nodes)
-            state.play(node.move)
-
-            # if some child node has not been explored select it before expanding
-            # other children
-            if node.N == 0:
-                return node, state
-
-        # if we reach a leaf node generate its children and return one of them
-        # if the node is terminal, just return the terminal node
-        if self.expand(node, state):
-            node = choice(list(node.children.values()))
-            state.play(node.move)
-        return node, state
+        result = super().expand(parent, state)
+        if parent.untried:
+            parent.amaf_q = array('i', [0]) * (state.size ** 2)
+            parent.amaf_n = array('i', [0]) * (state.size ** 2)
+        return result
 
-    @staticmethod
-    def expand(parent: RaveNode, state: GameState) -> bool:
+    def add_child(self, node: RaveNode, state: GameState) -> RaveNode:
         """
-        Generate the children of the passed "parent" node based on the available
-        moves in the passed gamestate and add them to the tree.
+        Create the child of an untried move as UctMctsAgent.add_child does and
+        hand it the AMAF statistics gathered for its move so far. With widening
+        the untried move with the best AMAF value is taken.
 
-        Returns:
-            object:
         """
-        children = []
-        if state.winner != GameMeta.PLAYERS["none"]:
-            # game is over at this node so nothing to expand
-            return False
+        size = state.size
+        amaf_q, amaf_n = node.amaf_q, node.amaf_n
+        if self.widening and amaf_n is not None:
+            untried = node.untried
 
-        for move in state.moves():
-            children.append(RaveNode(move, parent))
+            def amaf(i):
+                cell = untried[i][0] * size + untried[i][1]
+                # the untried moves are sorted by prior, which breaks ties
+                return amaf_q[cell] / amaf_n[cell] if amaf_n[cell] else -1.0, i
 
-        parent.add_children(children)
-        return True
+            best = max(range(len(untried)), key=amaf)
+            untried[best], untried[-1] = untried[-1], untried[best]
+        child = super().add_child(node, state)
+        if amaf_n is not None:
+            cell = child.move[0] * size + child.move[1]
+            child.Q_RAVE, child.N_RAVE = amaf_q[cell], amaf_n[cell]
+            if not node.untried:
+                node.amaf_q = node.amaf_n = None
+        return child
 
-    @staticmethod
-    def roll_out(state: GameState) -> tuple:
+    def reroot(self, node: RaveNode, transform: int = 0) -> None:
         """
-        Simulate a random game except that we play all known critical
-        cells first, return the winning player and record critical cells at the end.
+        Make the passed node the root as UctMctsAgent.reroot does, moving the
+        AMAF statistics of the untried moves through the transform too.
 
         """
-        moves = state.moves()
-        while state.winner == GameMeta.PLAYERS["none"]:
-            move = choice(moves)
-            state.play(move)
-            moves.remove(move)
-
-        black_rave_pts = []
-        white_rave_pts = []
-
-        for x in range(state.size):
-            for y in range(state.size):
-                if state.board[(x, y)] == GameMeta.PLAYERS["black"]:
-                    black_rave_pts.append((x, y))
-                elif state.board[(x, y)] == GameMeta.PLAYERS["white"]:
-                    white_rave_pts.append((x, y))
+        super().reroot(node, transform)
+        if transform == 0:
+            return
+        size = self.root_state.size
+        cells = [transform_cell((x, y), transform, size) for x in range(size) for y in range(size)]
+        mapping = [x * size + y for x, y in cells]
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.amaf_n is not None:
+                amaf_q, amaf_n = array('i', node.amaf_q), array('i', node.amaf_n)
+                for cell, image in enumerate(mapping):
+                    amaf_q[image], amaf_n[image] = node.amaf_q[cell], node.amaf_n[cell]
+                node.amaf_q, node.amaf_n = amaf_q, amaf_n
+            stack.extend(node.children.values())
 
-        return state.winner, black_rave_pts, white_rave_pts
+    @staticmethod
+    def rave_points(state: GameState) -> tuple:
+        """
+        Return the cells of the black stones and of the white stones on the board,
+        the points whose AMAF statistics are updated by the backup.
+        """
+        black = nonzero(state.board == GameMeta.PLAYERS["black"])
+        white = nonzero(state.board == GameMeta.PLAYERS["white"])
+        return list(zip(*(axis.tolist() for axis in black))), list(zip(*(axis.tolist() for axis in white)))
 
-    def backup(self, node: RaveNode, turn: int, outcome: int, black_rave_pts: list, white_rave_pts: list) -> None:
+    def backup(self, node: RaveNode, turn: int, outcome: int, state: GameState = None) -> None:
         """
         Update the node statistics on the path from the passed node to root to reflect
-        the outcome of a randomly simulated playout.
+        the outcome of a randomly simulated playout, and the AMAF statistics of the
+        children with the stones of the final state of the playout. Moves
+        without a child yet gather their AMAF statistics in the node.
         """
+        black_rave_pts, white_rave_pts = self.rave_points(state)
         # note that reward is calculated for player who just played
         # at the node and not the next player to play
         reward = -1 if outcome == turn else 1
+        quality = self.quality
 
+        size = state.size
         while node is not None:
-            if turn == GameMeta.PLAYERS["white"]:
-                for point in white_rave_pts:
-                    if point in node.children:
-                        node.children[point].Q_RAVE += -reward
-                        node.children[point].N_RAVE += 1
-            else:
-                for point in black_rave_pts:
-                    if point in node.children:
-                        node.children[point].Q_RAVE += -reward
-                        node.children[point].N_RAVE += 1
+            children, amaf_q, amaf_n = node.children, node.amaf_q, node.amaf_n
+            for point in white_rave_pts if turn == GameMeta.PLAYERS["white"] else black_rave_pts:
+                child = children.get(point)
+                if child is not None:
+                    child.Q_RAVE += -reward
+                    child.N_RAVE += 1
+                elif amaf_n is not None:
+                    cell = point[0] * size + point[1]
+                    amaf_q[cell] += -reward
+                    amaf_n[cell] += 1
 
             node.N += 1
-            node.Q += reward
-            turn = GameMeta.PLAYERS['white'] if turn == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+            # the reward belongs to the player who moved into the node, not to turn
+            player = GameMeta.PLAYERS['white'] if turn == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+            value = reward if quality is None else quality.reward(reward, player)
+            node.Q += value
+            node.Q2 += value * value
+            turn = player
             reward = -reward
             node = node.parent
 
 
-class DecisiveMoveMctsAgent(RaveMctsAgent):
+class DecisiveMoveMctsAgent(DecisiveMoveRollout, RaveMctsAgent):
+    """
+    RAVE agent with decisive move rollouts.
+    """
 
-    def roll_out(self, state: GameState) -> tuple:
-        """
-        Simulate a random game except that we play all known critical cells
-        first, return the winning player and record critical cells at the end.
-        """
-        moves = state.moves()
-        good_moves = moves.copy()
-        good_opponent_moves = moves.copy()
-        to_play = state.turn()
-
-        while state.winner == GameMeta.PLAYERS["none"]:
-            done = False
-            while len(good_moves) > 0 and not done:
-                move = choice(good_moves)
-                good_moves.remove(move)
-                if not state.would_lose(move, to_play):
-                    state.play(move)
-                    moves.remove(move)
-                    if move in good_opponent_moves:
-                        good_opponent_moves.remove(move)
-                    done = True
-
-            if not done:
-                move = choice(moves)
-                state.play(move)
-                moves.remove(move)
-                if move in good_opponent_moves:
-                    good_opponent_moves.remove(move)
-
-            good_moves, good_opponent_moves = good_opponent_moves, good_moves
-
-        black_rave_pts = []
-        white_rave_pts = []
-
-        for x in range(state.size):
-            for y in range(state.size):
-                if state.board[(x, y)] == GameMeta.PLAYERS["black"]:
-                    black_rave_pts.append((x, y))
-                elif state.board[(x, y)] == GameMeta.PLAYERS["white"]:
-                    white_rave_pts.append((x, y))
-
-        return state.winner, black_rave_pts, white_rave_pts
-
-
-class LGRMctsAgent(RaveMctsAgent):
-
-    def __init__(self, state: GameState = GameState(8)):
-        super().__init__(state)
-        self.black_reply = {}
-        self.white_reply = {}
-
-    def set_gamestate(self, state: GameState) -> None:
-        """
-        Set the root_state of the tree to the passed gamestate, this clears all
-        the information stored in the tree since none of it applies to the new
-        state.
-        """
-        super().set_gamestate(state)
-        self.white_reply = {}
-        self.black_reply = {}
 
-    def roll_out(self, state: GameState) -> tuple:
-        """
-        Simulate a random game except that we play all known critical
-        cells first, return the winning player and record critical cells at the end.
+class LGRMctsAgent(LGRRollout, RaveMctsAgent):
+    """
+    RAVE agent with last-good-reply rollouts.
+    """
 
-        """
-        moves = state.moves()
-        first = state.turn()
-        if first == GameMeta.PLAYERS["black"]:
-            current_reply = self.black_reply
-            other_reply = self.white_reply
-        else:
-            current_reply = self.white_reply
-            other_reply = self.black_reply
-        black_moves = []
-        white_moves = []
-        last_move = None
-        while state.winner == GameMeta.PLAYERS["none"]:
-            if last_move in current_reply:
-                move = current_reply[last_move]
-                if move not in moves or random() > MCTSMeta.RANDOMNESS:
-                    move = choice(moves)
-            else:
-                move = choice(moves)
-            if state.turn() == GameMeta.PLAYERS["black"]:
-                black_moves.append(move)
-            else:
-                white_moves.append(move)
-            current_reply, other_reply = other_reply, current_reply
-            state.play(move)
-            moves.remove(move)
-            last_move = move
-
-        black_rave_pts = []
-        white_rave_pts = []
-
-        for x in range(state.size):
-            for y in range(state.size):
-                if state.board[(x, y)] == GameMeta.PLAYERS["black"]:
-                    black_rave_pts.append((x, y))
-                elif state.board[(x, y)] == GameMeta.PLAYERS["white"]:
-                    white_rave_pts.append((x, y))
-
-        # This part of the algorithm probably deals with adjusting
-        # the indices of the arrays.
-
-        offset = 0
-        skip = 0
-        if state.winner == GameMeta.PLAYERS["black"]:
-
-            if first == GameMeta.PLAYERS["black"]:
-                offset = 1
-            if state.turn() == GameMeta.PLAYERS["black"]:
-                skip = 1
-            for i in range(len(white_moves) - skip):
-                self.black_reply[white_moves[i]] = black_moves[i + offset]
-        else:
-            if first == GameMeta.PLAYERS["white"]:
-                offset = 1
-            if state.turn() == GameMeta.PLAYERS["white"]:
-                skip = 1
-            for i in range(len(black_moves) - skip):
-                self.white_reply[black_moves[i]] = white_moves[i + offset]
 
-        return state.winner, black_rave_pts, white_rave_pts
+class LGRFMctsAgent(LGRFRollout, RaveMctsAgent):
+    """
+    RAVE agent with last-good-reply rollouts with forgetting and replies to
+    the last two moves (LGRF-2).
+    """
 
 
-class PoolRaveMctsAgent(RaveMctsAgent):
-
-    def __init__(self, state: GameState = GameState(8)):
-        super().__init__(state)
-        self.black_rave = {}
-        self.white_rave = {}
-
-    def set_gamestate(self, state: GameState) -> None:
-        """
-        Set the root_state of the tree to the passed gamestate, this clears all
-        the information stored in the tree since none of it applies to the new
-        state.
-        """
-        super().set_gamestate(state)
-        self.black_rave = {}
-        self.white_rave = {}
-
-    def roll_out(self, state: GameState) -> tuple:
-        """
-        Simulate a random game except that we play all known critical
-        cells first, return the winning player and record critical cells at the end.
-
-        """
-        moves = state.moves()
-        black_rave_moves = sorted(self.black_rave.keys(),
-                                  key=lambda cell: self.black_rave[cell])
-        white_rave_moves = sorted(self.white_rave.keys(),
-                                  key=lambda cell: self.white_rave[cell])
-        black_pool = []
-        white_pool = []
-
-        i = 0
-        while len(black_pool) < MCTSMeta.POOLRAVE_CAPACITY and i < len(black_rave_moves):
-            if black_rave_moves[i] in moves:
-                black_pool.append(black_rave_moves[i])
-            i += 1
-        i = 0
-        while len(white_pool) < MCTSMeta.POOLRAVE_CAPACITY and i < len(white_rave_moves):
-            if white_rave_moves[i] in moves:
-                white_pool.append(white_rave_moves[i])
-            i += 1
-        num_pool = 0
-        while state.winner == GameMeta.PLAYERS["none"]:
-            move = None
-            if len(black_pool) > 0 and state.turn() == GameMeta.PLAYERS["black"]:
-                move = choice(black_pool)
-                num_pool += 1
-            elif len(white_pool) > 0:
-                move = choice(white_pool)
-                num_pool += 1
-            if random() > MCTSMeta.RANDOMNESS or not move or move not in moves:
-                move = choice(moves)
-                num_pool -= 1
-
-            state.play(move)
-            moves.remove(move)
-
-        black_rave_pts = []
-        white_rave_pts = []
-
-        for x in range(state.size):
-            for y in range(state.size):
-                if state.board[(x, y)] == GameMeta.PLAYERS["black"]:
-                    black_rave_pts.append((x, y))
-                    if state.winner == GameMeta.PLAYERS["black"]:
-                        if (x, y) in self.black_rave:
-                            self.black_rave[(x, y)] += 1
-                        else:
-                            self.black_rave[(x, y)] = 1
-                    else:
-                        if (x, y) in self.black_rave:
-                            self.black_rave[(x, y)] -= 1
-                        else:
-                            self.black_rave[(x, y)] = -1
-                elif state.board[(x, y)] == GameMeta.PLAYERS["white"]:
-                    white_rave_pts.append((x, y))
-                    if state.winner == GameMeta.PLAYERS["white"]:
-                        if (x, y) in self.white_rave:
-                            self.white_rave[(x, y)] += 1
-                        else:
-                            self.white_rave[(x, y)] = 1
-                    else:
-                        if (x, y) in self.white_rave:
-                            self.white_rave[(x, y)] -= 1
-                        else:
-                            self.white_rave[(x, y)] = -1
-
-        return state.winner, black_rave_pts, white_rave_pts
+class PoolRaveMctsAgent(PoolRaveRollout, RaveMctsAgent):
+    """
+    RAVE agent whose rollouts prefer the moves of the pools of best AMAF cells.
+    """
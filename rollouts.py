@@ -0,0 +1,255 @@
+from numpy import zeros, int_, argsort
+
+from gamestate import GameState
+from meta import GameMeta, MCTSMeta
+
+
+class DecisiveMoveRollout:
+    """
+    Rollout policy which never plays a move that loses on the spot while there
+    is another choice. Mixed into an agent in front of its search class, e.g.
+    class DecisiveMoveMctsAgent(DecisiveMoveRollout, RaveMctsAgent).
+    """
+
+    def roll_out(self, state: GameState) -> int:
+        """
+        Simulate a random game except that we play all known critical cells
+        first, return the winning player.
+        """
+        moves = state.moves()
+        good_moves = moves.copy()
+        good_opponent_moves = moves.copy()
+        to_play = state.turn()
+
+        while state.winner == GameMeta.PLAYERS["none"]:
+            done = False
+            while len(good_moves) > 0 and not done:
+                move = self.rng.choice(good_moves)
+                good_moves.remove(move)
+                if not state.would_lose(move, to_play):
+                    state.play(move)
+                    moves.remove(move)
+                    if move in good_opponent_moves:
+                        good_opponent_moves.remove(move)
+                    done = True
+
+            if not done:
+                move = self.rng.choice(moves)
+                state.play(move)
+                moves.remove(move)
+                if move in good_opponent_moves:
+                    good_opponent_moves.remove(move)
+
+            good_moves, good_opponent_moves = good_opponent_moves, good_moves
+
+        return state.winner
+
+
+class LGRRollout:
+    """
+    Rollout policy which plays the last good reply to the previous move.
+    Replies are stored in flat integer tables indexed by the cell id
+    (x * size + y) of the previous move, -1 meaning no reply.
+
+    Attributes:
+        forget (bool): forget the replies of the losing player (LGRF)
+        two_moves (bool): also keep replies to the last two moves (LGR-2), which
+                          are tried before the replies to the last move
+        black_reply (list): reply of black to each previous move
+        white_reply (list): reply of white to each previous move
+        black_reply2 (list): reply of black to each pair of previous moves,
+                             indexed by id of second last * cells + id of last
+        white_reply2 (list): reply of white to each pair of previous moves
+    """
+    forget = False
+    two_moves = False
+
+    def reset_policy(self) -> None:
+        """
+        Clear the reply tables.
+        """
+        super().reset_policy()
+        cells = self.root_state.size ** 2
+        self.black_reply = [-1] * cells
+        self.white_reply = [-1] * cells
+        self.black_reply2 = [-1] * (cells * cells) if self.two_moves else []
+        self.white_reply2 = [-1] * (cells * cells) if self.two_moves else []
+
+    def roll_out(self, state: GameState) -> int:
+        """
+        Simulate a random game except that we play all known critical
+        cells first, return the winning player and record the replies.
+
+        """
+        rng = self.rng
+        size = state.size
+        cells = size * size
+        moves = [x * size + y for x, y in state.moves()]
+        # position of every legal cell id in the list, for constant time removal
+        positions = {move: i for i, move in enumerate(moves)}
+        replies = {GameMeta.PLAYERS["black"]: (self.black_reply, self.black_reply2),
+                   GameMeta.PLAYERS["white"]: (self.white_reply, self.white_reply2)}
+        first = state.turn()
+        sequence = []
+        last_move = second_last = -1
+        while state.winner == GameMeta.PLAYERS["none"]:
+            reply, reply2 = replies[state.turn()]
+            move = -1
+            if self.two_moves and second_last >= 0:
+                move = reply2[second_last * cells + last_move]
+            if move not in positions and last_move >= 0:
+                move = reply[last_move]
+            if move not in positions or rng.random() > MCTSMeta.RANDOMNESS:
+                move = rng.choice(moves)
+            state.play(divmod(move, size))
+            sequence.append(move)
+            i = positions.pop(move)
+            last = moves.pop()
+            if last != move:
+                moves[i] = last
+                positions[last] = i
+            second_last, last_move = last_move, move
+
+        self.update_replies(sequence, first, state.winner, cells)
+        return state.winner
+
+    def update_replies(self, sequence: list, first: int, winner: int, cells: int) -> None:
+        """
+        Store the replies of the winner to the moves of the playout and, with
+        forgetting, remove the replies the loser played from its tables.
+
+        Args:
+            sequence: cell ids of the moves of the playout
+            first: the player who played the first move of the playout
+            winner: winner of the playout
+            cells: number of cells of the board
+        """
+        replies = {GameMeta.PLAYERS["black"]: (self.black_reply, self.black_reply2),
+                   GameMeta.PLAYERS["white"]: (self.white_reply, self.white_reply2)}
+        other = GameMeta.PLAYERS["white"] if first == GameMeta.PLAYERS["black"] else GameMeta.PLAYERS["black"]
+        for i in range(1, len(sequence)):
+            player = other if i % 2 else first
+            reply, reply2 = replies[player]
+            move, previous = sequence[i], sequence[i - 1]
+            index2 = (sequence[i - 2] * cells + previous) if self.two_moves and i > 1 else -1
+            if player == winner:
+                reply[previous] = move
+                if index2 >= 0:
+                    reply2[index2] = move
+            elif self.forget:
+                if reply[previous] == move:
+                    reply[previous] = -1
+                if index2 >= 0 and reply2[index2] == move:
+                    reply2[index2] = -1
+
+
+class LGRFRollout(LGRRollout):
+    """
+    Last-good-reply with forgetting and replies to the last two moves (LGRF-2).
+    """
+    forget = True
+    two_moves = True
+
+
+class PoolRaveRollout:
+    """
+    Rollout policy which prefers moves from a pool of the cells with the best
+    global AMAF score of each player.
+
+    Attributes:
+        black_rave (ndarray): global AMAF score of every cell for black
+        white_rave (ndarray): global AMAF score of every cell for white
+        black_count (ndarray): number of rollouts in which black played every cell
+        white_count (ndarray): number of rollouts in which white played every cell
+        black_ranking (list): cells black has played sorted by black score, best first
+        white_ranking (list): cells white has played sorted by white score, best first
+        rollouts_since_refresh (int): rollouts played with the current rankings
+    """
+
+    def reset_policy(self) -> None:
+        """
+        Clear the AMAF scores and the rankings of the pools.
+        """
+        super().reset_policy()
+        self.black_rave = zeros((self.root_state.size, self.root_state.size), dtype=int_)
+        self.white_rave = zeros((self.root_state.size, self.root_state.size), dtype=int_)
+        self.black_count = zeros((self.root_state.size, self.root_state.size), dtype=int_)
+        self.white_count = zeros((self.root_state.size, self.root_state.size), dtype=int_)
+        self.black_ranking = []
+        self.white_ranking = []
+        self.rollouts_since_refresh = 0
+
+    def refresh_rankings(self) -> None:
+        """
+        Sort the cells by score. This runs every MCTSMeta.POOLRAVE_REFRESH rollouts
+        rather than on every rollout. Cells the player has not played in any
+        rollout have no score yet and are left out, rather than being ranked
+        above the cells with a known negative score.
+        """
+        size = self.root_state.size
+        for scores, counts, ranking in ((self.black_rave, self.black_count, self.black_ranking),
+                                        (self.white_rave, self.white_count, self.white_ranking)):
+            ranking.clear()
+            order = argsort(-scores, axis=None, kind='stable')
+            for cell in order[counts.ravel()[order] > 0].tolist():
+                ranking.append(divmod(cell, size))
+        self.rollouts_since_refresh = 0
+
+    @staticmethod
+    def pool(ranking: list, legal: dict) -> list:
+        """
+        Return the first MCTSMeta.POOLRAVE_CAPACITY legal cells of the ranking.
+        """
+        pool = []
+        for cell in ranking:
+            if cell in legal:
+                pool.append(cell)
+                if len(pool) == MCTSMeta.POOLRAVE_CAPACITY:
+                    break
+        return pool
+
+    def roll_out(self, state: GameState) -> int:
+        """
+        Simulate a random game except that we play all known critical
+        cells first, return the winning player and record critical cells at the end.
+
+        """
+        if self.rollouts_since_refresh == 0 or self.rollouts_since_refresh >= MCTSMeta.POOLRAVE_REFRESH:
+            self.refresh_rankings()
+        self.rollouts_since_refresh += 1
+
+        rng = self.rng
+        moves = state.moves()
+        # position of every legal move in the list, for constant time removal
+        positions = {move: i for i, move in enumerate(moves)}
+        black_pool = self.pool(self.black_ranking, positions)
+        white_pool = self.pool(self.white_ranking, positions)
+        while state.winner == GameMeta.PLAYERS["none"]:
+            move = None
+            if state.turn() == GameMeta.PLAYERS["black"]:
+                if len(black_pool) > 0:
+                    move = rng.choice(black_pool)
+            elif len(white_pool) > 0:
+                move = rng.choice(white_pool)
+            if rng.random() > MCTSMeta.RANDOMNESS or not move or move not in positions:
+                move = rng.choice(moves)
+
+            state.play(move)
+            i = positions.pop(move)
+            last = moves.pop()
+            if last != move:
+                moves[i] = last
+                positions[last] = i
+
+        black = state.board == GameMeta.PLAYERS["black"]
+        white = state.board == GameMeta.PLAYERS["white"]
+        self.black_count += black
+        self.white_count += white
+        if state.winner == GameMeta.PLAYERS["black"]:
+            self.black_rave += black
+            self.white_rave -= white
+        else:
+            self.black_rave -= black
+            self.white_rave += white
+
+        return state.winner
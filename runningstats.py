@@ -0,0 +1,71 @@
+from collections import deque
+from math import sqrt
+
+
+class RunningStats:
+    """
+    Notes:
+        Online mean and (population) variance of a stream of numbers in O(1) per
+        sample using Welford's algorithm. Optionally only the last window samples
+        are kept, or older samples are faded out with an exponential decay.
+
+    Attributes:
+        window (int): number of most recent samples to keep, 0 keeps them all
+        decay (float): weight of a new sample in the exponential moving statistics,
+                       0 disables the decay
+        n (int): number of samples seen (capped by window)
+        mean (float): running mean
+        m2 (float): running sum of squared deviations from the mean
+        samples (deque): the samples inside the window when a window is used
+    """
+
+    def __init__(self, window: int = 0, decay: float = 0.0) -> None:
+        self.window = window
+        self.decay = decay
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.samples = deque()
+
+    def push(self, x: float) -> None:
+        """
+        Add a sample to the statistics.
+        """
+        if self.n == 0:
+            self.n = 1
+            self.mean = float(x)
+            self.m2 = 0.0
+            if self.window:
+                self.samples.append(x)
+            return
+
+        if self.decay:
+            # exponentially weighted mean and variance, m2 holds the variance itself
+            delta = x - self.mean
+            self.mean += self.decay * delta
+            self.m2 = (1 - self.decay) * (self.m2 + self.decay * delta * delta)
+            self.n += 1
+        elif self.window and self.n == self.window:
+            # replace the oldest sample by the new one
+            old = self.samples.popleft()
+            self.samples.append(x)
+            mean = self.mean + (x - old) / self.n
+            self.m2 += (x - old) * (x - mean + old - self.mean)
+            self.mean = mean
+        else:
+            if self.window:
+                self.samples.append(x)
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        if self.decay:
+            return self.m2
+        return max(self.m2, 0.0) / self.n if self.n else 0.0
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import os
+from math import isfinite
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+
+from agents import agent_class, make_agent
+from gamestate import GameState
+from meta import GameMeta
+
+
+def search_move(agent_name: str, state: GameState, move_time: float, seed=None) -> tuple:
+    """
+    Search the passed position with a fresh agent and return its move. This runs
+    inside the worker processes of the server, which keep no state between calls
+    so an idle game costs nothing.
+
+    Returns:
+        tuple: (move, number of rollouts, seconds searched)
+    """
+    agent = make_agent(agent_name, state, seed)
+    agent.search(move_time)
+    move = agent.best_move()
+    num_rollouts, node_count, run_time, profile = agent.statistics()
+    return move, num_rollouts, run_time
+
+
+def parse_cell(text: str, size: int) -> tuple:
+    """
+    Return the cell (x, y) of a GTP vertex such as "c5".
+
+    Raises:
+        ValueError if the vertex is malformed or off the board
+    """
+    if len(text) < 2:
+        raise ValueError("Malformed arguments")
+    x = ord(text[0].lower()) - ord('a')
+    y = int(text[1:]) - 1
+    if x < 0 or y < 0 or x >= size or y >= size:
+        raise ValueError("Cell out of bounds")
+    return x, y
+
+
+def format_cell(cell: tuple) -> str:
+    return chr(ord('a') + cell[0]) + str(cell[1] + 1)
+
+
+class Game:
+    """
+    One game hosted by the server.
+
+    Attributes:
+        agent (str): name of the agent playing the engine moves
+        state (GameState): current position
+        move_time (float): seconds of search per engine move
+        budget (float): seconds of search left for the whole game, None for no limit
+        lock (asyncio.Lock): serializes the commands of the game
+    """
+
+    def __init__(self, agent: str, size: int, move_time: float, budget: float = None) -> None:
+        self.agent = agent
+        self.state = GameState(size)
+        self.move_time = move_time
+        self.budget = budget
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    """
+    Notes:
+        Asyncio server hosting many concurrent games behind a JSON-lines protocol.
+        Every request is one JSON object on a line, answered by one line:
+
+            {"id": 1, "command": "new", "agent": "RAVE", "size": 11, "time": 2}
+            {"id": 1, "ok": true, "game": 3}
+            {"id": 2, "game": 3, "command": "play", "colour": "b", "cell": "f6"}
+            {"id": 3, "game": 3, "command": "genmove"}
+            {"id": 3, "ok": true, "move": "e7", "rollouts": 5210, "time": 2.0}
+
+        Commands are new, play, genmove, show, winner and close. Searches run in a
+        bounded process pool; at most workers searches run at once and the others
+        wait in arrival order, so busy games share the cores fairly. Admission
+        control refuses new games beyond max_games, boards larger than max_size
+        and searches once max_queue of them are waiting. A game may carry a total search budget which its
+        genmoves draw from.
+
+    Attributes:
+        workers (int): size of the process pool
+        max_games (int): most games hosted at once
+        max_queue (int): most searches waiting for a worker
+        max_time (float): longest search a game may ask for per move
+        max_size (int): largest board a game may ask for, at most 26 so that
+                        every cell has a vertex letter
+        games (dict): hosted games by id
+        waiting (int): searches waiting for a worker
+    """
+
+    def __init__(self, workers: int = None, max_games: int = 64, max_queue: int = 64,
+                 max_time: float = 30, max_size: int = 26) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_games = max_games
+        self.max_queue = max_queue
+        self.max_time = max_time
+        self.max_size = min(max_size, 26)
+        self.games = {}
+        self.waiting = 0
+        self.ids = count(1)
+        self.executor = None
+        self.slots = None
+
+    async def serve(self, host: str = 'localhost', port: int = 5000) -> None:
+        """
+        Accept connections until cancelled.
+        """
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(self.workers)
+        server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answer the requests of one connection. Requests on a connection are
+        handled concurrently, so replies may come back out of order and carry
+        the id of their request.
+        """
+        tasks = set()
+        lock = asyncio.Lock()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = None
+            if not isinstance(request, dict):
+                reply = {'ok': False, 'error': 'Malformed request'}
+            else:
+                try:
+                    reply = await self.execute(request)
+                except (ValueError, TypeError) as error:
+                    reply = {'ok': False, 'error': str(error) or 'Malformed arguments'}
+                reply['id'] = request.get('id')
+            async with lock:
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    async def execute(self, request: dict) -> dict:
+        """
+        Execute one request and return the reply.
+        """
+        command = request.get('command')
+        if command == 'new':
+            return self.new_game(request)
+        game = self.games.get(request.get('game'))
+        if game is None:
+            return {'ok': False, 'error': 'Unknown game'}
+        async with game.lock:
+            if command == 'play':
+                return self.play(game, request)
+            if command == 'genmove':
+                return await self.genmove(game)
+            if command == 'show':
+                return {'ok': True, 'board': str(game.state)}
+            if command == 'winner':
+                return {'ok': True, 'winner': self.winner(game.state)}
+            if command == 'close':
+                del self.games[request['game']]
+                return {'ok': True}
+        return {'ok': False, 'error': 'Unrecognized command'}
+
+    def new_game(self, request: dict) -> dict:
+        if len(self.games) >= self.max_games:
+            return {'ok': False, 'error': 'Too many games'}
+        agent = str(request.get('agent', 'UCT'))
+        try:
+            agent_class(agent)
+        except KeyError:
+            return {'ok': False, 'error': 'Unknown agent'}
+        try:
+            size = int(request.get('size', 8))
+        except (ValueError, TypeError):
+            size = 0
+        if not 1 <= size <= self.max_size:
+            return {'ok': False, 'error': 'Argument is not a valid size'}
+        move_time = self.seconds(request.get('time', 1))
+        if move_time is None:
+            return {'ok': False, 'error': 'Argument is not a valid time'}
+        budget = request.get('budget')
+        if budget is not None:
+            budget = self.seconds(budget)
+            if budget is None:
+                return {'ok': False, 'error': 'Argument is not a valid budget'}
+        game_id = next(self.ids)
+        self.games[game_id] = Game(agent, size, min(move_time, self.max_time), budget)
+        return {'ok': True, 'game': game_id}
+
+    @staticmethod
+    def seconds(value):
+        """
+        Return the passed number of seconds as a float, None unless it is finite
+        and positive.
+        """
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return None
+        return value if isfinite(value) and value > 0 else None
+
+    @staticmethod
+    def play(game: Game, request: dict) -> dict:
+        colour = str(request.get('colour', ''))[:1].lower()
+        if colour not in ('w', 'b'):
+            return {'ok': False, 'error': 'Player not recognized'}
+        cell = parse_cell(str(request.get('cell', '')), game.state.size)
+        # validate before changing the turn so a rejected play leaves the game as it was
+        if game.state.winner != GameMeta.PLAYERS['none']:
+            return {'ok': False, 'error': 'The game is already over'}
+        if game.state.board[cell] != GameMeta.PLAYERS['none']:
+            return {'ok': False, 'error': 'Cell occupied'}
+        player = GameMeta.PLAYERS['white' if colour == 'w' else 'black']
+        if game.state.turn() != player:
+            game.state.set_turn(player)
+        game.state.play(cell)
+        return {'ok': True}
+
+    async def genmove(self, game: Game) -> dict:
+        if game.state.winner != GameMeta.PLAYERS['none']:
+            return {'ok': False, 'error': 'The game is already over'}
+        move_time = game.move_time if game.budget is None else min(game.move_time, game.budget)
+        if move_time <= 0:
+            return {'ok': False, 'error': 'Search budget exhausted'}
+        if self.waiting >= self.max_queue:
+            return {'ok': False, 'error': 'Server busy'}
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            move, num_rollouts, run_time = await loop.run_in_executor(
+                self.executor, search_move, game.agent, game.state, move_time)
+        finally:
+            self.slots.release()
+        if game.budget is not None:
+            game.budget -= run_time
+        game.state.play(move)
+        return {'ok': True, 'move': format_cell(move), 'rollouts': num_rollouts, 'time': run_time}
+
+    @staticmethod
+    def winner(state: GameState) -> str:
+        if state.winner == GameMeta.PLAYERS['white']:
+            return 'white'
+        if state.winner == GameMeta.PLAYERS['black']:
+            return 'black'
+        return 'none'
+
+
+def main(argv: list = None) -> None:
+    """
+    Run the game server, e.g.
+
+        python server.py --port 5000 --workers 8
+    """
+    parser = argparse.ArgumentParser(description='HexPy multi-game server.')
+    parser.add_argument('--host', default='localhost', help='address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='port to listen on')
+    parser.add_argument('--workers', type=int, help='search processes, all cores by default')
+    parser.add_argument('--max-games', type=int, default=64, help='most games hosted at once')
+    parser.add_argument('--max-queue', type=int, default=64, help='most searches waiting for a worker')
+    parser.add_argument('--max-time', type=float, default=30, help='longest search per move in seconds')
+    parser.add_argument('--max-size', type=int, default=26, help='largest board size, at most 26')
+    args = parser.parse_args(argv)
+    server = GameServer(args.workers, args.max_games, args.max_queue, args.max_time, args.max_size)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
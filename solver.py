@@ -0,0 +1,149 @@
+from meta import GameMeta
+from gamestate import GameState, transform_cell
+
+
+class Solver:
+    """
+    Notes:
+        Exact depth-first solver for small hex endgames. Positions are searched
+        on a flat copy of the board (cell index = x * size + y) so that moves can
+        be played and undone in place instead of copying the GameState, and every
+        solved position is stored in a transposition table. Solved root positions
+        are also kept under their canonical hash so that symmetric positions are
+        solved once.
+
+    Attributes:
+        size (int): board size the neighbor table was built for
+        neighbors (list): neighbor cell indices of every cell
+        table (dict): transposition table, (board bytes, to_play) -> winner
+        solved (dict): canonical hash -> winner and winning move of the canonical
+                       position
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.neighbors = []
+        self.table = {}
+        self.solved = {}
+
+    def reset(self, size: int) -> None:
+        """
+        Rebuild the neighbor table for the passed board size and clear the
+        transposition table.
+
+        Args:
+            size (int): The board size
+        """
+        self.size = size
+        self.neighbors = []
+        for x in range(size):
+            for y in range(size):
+                self.neighbors.append([(x + dx) * size + y + dy for dx, dy in GameMeta.NEIGHBOR_PATTERNS
+                                       if 0 <= x + dx < size and 0 <= y + dy < size])
+        self.table = {}
+        self.solved = {}
+
+    def solve(self, state: GameState, moves: list = None) -> tuple:
+        """
+        Solve the passed position exactly.
+
+        Args:
+            state (GameState): position to solve, it is not modified
+            moves (list): moves to consider for the player to move, all empty
+                          cells by default
+
+        Returns:
+            tuple: winner of the position with perfect play and the winning move of
+                   the player to move (None if the player to move loses)
+        """
+        if state.size != self.size:
+            self.reset(state.size)
+        winner = state.winner
+        if winner != GameMeta.PLAYERS['none']:
+            return winner, None
+
+        key, transform = state.canonical()
+        if key not in self.solved:
+            winner, move = self._solve(state, moves)
+            if transform >= 2:
+                winner = self._other(winner)
+            self.solved[key] = winner, move and transform_cell(move, transform, self.size)
+        winner, move = self.solved[key]
+        if transform >= 2:
+            winner = self._other(winner)
+        return winner, move and transform_cell(move, transform, self.size)
+
+    @staticmethod
+    def _other(player: int) -> int:
+        return GameMeta.PLAYERS['black'] if player == GameMeta.PLAYERS['white'] else GameMeta.PLAYERS['white']
+
+    def _solve(self, state: GameState, moves: list) -> tuple:
+        """
+        Search the root position of solve.
+        """
+        board = bytearray(state.board.flatten().tolist())
+        if moves is None:
+            empty = [i for i in range(len(board)) if board[i] == GameMeta.PLAYERS['none']]
+        else:
+            empty = [x * self.size + y for x, y in moves]
+        to_play = state.turn()
+        other = self._other(to_play)
+        for cell in self._ordered(board, empty):
+            board[cell] = to_play
+            if self._connects(board, cell, to_play) or not self._wins(board, other, to_play):
+                return to_play, divmod(cell, self.size)
+            board[cell] = GameMeta.PLAYERS['none']
+        return other, None
+
+    def _wins(self, board: bytearray, to_play: int, other: int) -> bool:
+        """
+        Return True if the player to move wins the passed position.
+        """
+        key = (bytes(board), to_play)
+        if key in self.table:
+            return self.table[key] == to_play
+
+        result = False
+        empty = [i for i in range(len(board)) if board[i] == GameMeta.PLAYERS['none']]
+        for cell in self._ordered(board, empty):
+            board[cell] = to_play
+            if self._connects(board, cell, to_play) or not self._wins(board, other, to_play):
+                result = True
+            board[cell] = GameMeta.PLAYERS['none']
+            if result:
+                break
+        self.table[key] = to_play if result else other
+        return result
+
+    def _ordered(self, board: bytearray, empty: list) -> list:
+        """
+        Order the moves so that cells touching many stones are tried first, they
+        are the most likely to complete or block a connection.
+        """
+        return sorted(empty, key=lambda cell: -sum(board[n] != GameMeta.PLAYERS['none']
+                                                   for n in self.neighbors[cell]))
+
+    def _connects(self, board: bytearray, cell: int, color: int) -> bool:
+        """
+        Return True if the group of the stone just placed on cell connects both
+        edges of its color.
+        """
+        size = self.size
+        edge1 = edge2 = False
+        seen = {cell}
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            x, y = divmod(current, size)
+            line = x if color == GameMeta.PLAYERS['white'] else y
+            if line == 0:
+                edge1 = True
+            if line == size - 1:
+                edge2 = True
+            if edge1 and edge2:
+                return True
+            for n in self.neighbors[current]:
+                if n not in seen and board[n] == color:
+                    seen.add(n)
+                    stack.append(n)
+        return False
@@ -0,0 +1,100 @@
+from math import erf, inf, log, log10, sqrt
+from statistics import NormalDist
+
+
+def elo(score: float) -> float:
+    """
+    Return the Elo difference matching the passed expected score in [0, 1].
+    """
+    if score <= 0:
+        return -inf
+    if score >= 1:
+        return inf
+    return -400 * log10(1 / score - 1)
+
+
+def expected_score(elo_difference: float) -> float:
+    """
+    Return the expected score of a player who is elo_difference points stronger.
+    """
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+def elo_interval(wins: int, losses: int, confidence: float = 0.95) -> tuple:
+    """
+    Estimate the Elo difference of a player from its wins and losses (hex has
+    no draws) with a Wilson score confidence interval. After a shut-out half a
+    game is added to both sides (Haldane-Anscombe correction), so the estimate
+    and both bounds stay finite and the interval stays wide.
+
+    Returns:
+        tuple: (elo, lower bound, upper bound)
+    """
+    if wins + losses == 0:
+        return 0.0, -inf, inf
+    if wins == 0 or losses == 0:
+        wins, losses = wins + 0.5, losses + 0.5
+    games = wins + losses
+    score = wins / games
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    shrink = 1 + z * z / games
+    centre = (score + z * z / (2 * games)) / shrink
+    margin = z / shrink * sqrt(score * (1 - score) / games + z * z / (4 * games * games))
+    return elo(score), elo(centre - margin), elo(centre + margin)
+
+
+def los(wins: int, losses: int) -> float:
+    """
+    Return the likelihood of superiority, the probability that the player with
+    the passed wins and losses is the stronger one.
+    """
+    if wins + losses == 0:
+        return 0.5
+    return 0.5 * (1 + erf((wins - losses) / sqrt(2 * (wins + losses))))
+
+
+class SPRT:
+    """
+    Notes:
+        Sequential probability ratio test of H0: the Elo difference is elo0
+        against H1: it is elo1, on a stream of game results without draws.
+        After every game the log-likelihood ratio is compared with the bounds
+        derived from the error rates and the test stops as soon as it leaves
+        them.
+
+    Attributes:
+        elo0 (float): Elo difference of the null hypothesis
+        elo1 (float): Elo difference of the alternative hypothesis
+        alpha (float): probability of accepting H1 when H0 holds
+        beta (float): probability of accepting H0 when H1 holds
+        lower (float): accept H0 when the ratio falls below this bound
+        upper (float): accept H1 when the ratio rises above this bound
+    """
+
+    def __init__(self, elo0: float = 0, elo1: float = 50, alpha: float = 0.05, beta: float = 0.05) -> None:
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = log(beta / (1 - alpha))
+        self.upper = log((1 - beta) / alpha)
+
+    def llr(self, wins: int, losses: int) -> float:
+        """
+        Return the log-likelihood ratio of H1 against H0 for the passed results.
+        """
+        p0 = expected_score(self.elo0)
+        p1 = expected_score(self.elo1)
+        return wins * log(p1 / p0) + losses * log((1 - p1) / (1 - p0))
+
+    def verdict(self, wins: int, losses: int):
+        """
+        Return 'H1' if the results show the player to be elo1 stronger, 'H0' if
+        they show it to be only elo0 stronger, None while undecided.
+        """
+        ratio = self.llr(wins, losses)
+        if ratio >= self.upper:
+            return 'H1'
+        if ratio <= self.lower:
+            return 'H0'
+        return None
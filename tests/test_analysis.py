@@ -0,0 +1,22 @@
+import pytest
+
+from agents import AGENTS, make_agent
+from gamestate import GameState
+
+
+@pytest.mark.parametrize('name', sorted(AGENTS))
+def test_analysis_reports_win_rates(name):
+    agent = make_agent(name, GameState(4), seed=0)
+    for _ in range(300):
+        agent.simulate()
+    analysis = agent.analysis(16)
+    assert analysis
+    for child in analysis:
+        assert 0.0 <= child['Q'] <= 1.0
+        assert child['rave'] is None or 0.0 <= child['rave'] <= 1.0
+
+
+def test_win_rate_scales_agree():
+    assert make_agent('UCT').win_rate(1.0) == make_agent('RAVE').win_rate(1.0) == 1.0
+    assert make_agent('UCT').win_rate(0.0) == make_agent('QB').win_rate(-1.0) == 0.0
+    assert make_agent('UCT').win_rate(0.5) == make_agent('RAVE').win_rate(0.0) == 0.5
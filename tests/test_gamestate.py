@@ -0,0 +1,66 @@
+from random import Random
+
+import pytest
+
+from gamestate import GameState, transform_cell
+from meta import GameMeta
+
+WHITE, BLACK = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+
+
+def random_position(size: int, stones: int, rng: Random) -> GameState:
+    state = GameState(size)
+    moves = state.moves()
+    rng.shuffle(moves)
+    for move in moves[:stones]:
+        state.play(move)
+    return state
+
+
+def transformed(state: GameState, transform: int) -> GameState:
+    """
+    Build the position mapped through the passed symmetry from scratch, the
+    transposes also swap the colors of the stones and of the player to move.
+    """
+    swap = transform >= 2
+    result = GameState(state.size)
+    for x in range(state.size):
+        for y in range(state.size):
+            color = state.board[x, y]
+            cell = transform_cell((x, y), transform, state.size)
+            if color == (BLACK if swap else WHITE):
+                result.place_white(cell)
+            elif color == (WHITE if swap else BLACK):
+                result.place_black(cell)
+    to_play = state.turn()
+    result.set_turn((WHITE if to_play == BLACK else BLACK) if swap else to_play)
+    return result
+
+
+@pytest.mark.parametrize('transform', range(4))
+def test_transform_is_its_own_inverse(transform):
+    for x in range(5):
+        for y in range(5):
+            assert transform_cell(transform_cell((x, y), transform, 5), transform, 5) == (x, y)
+
+
+@pytest.mark.parametrize('size', [4, 5, 7])
+def test_hashes_follow_the_symmetries(size):
+    rng = Random(size)
+    for stones in range(size * size // 2):
+        state = random_position(size, stones, rng)
+        key, transform = state.canonical()
+        for t in range(4):
+            image = transformed(state, t)
+            assert image.hashes[0] == state.hashes[t]
+            assert image.canonical()[0] == key
+            assert (image.canonical_board() == state.canonical_board()).all()
+        assert transformed(state, transform).hash == key
+
+
+def test_hash_tracks_the_player_to_move():
+    state = random_position(5, 6, Random(0))
+    other = transformed(state, 0)
+    other.set_turn(WHITE if state.turn() == BLACK else BLACK)
+    assert other.hashes == state.hashes
+    assert other.hash != state.hash
@@ -0,0 +1,33 @@
+from agents import make_agent
+from gtp import GTPInterface
+from meta import GameMeta
+
+
+def interface(size=5):
+    gtp = GTPInterface(make_agent('UCT', seed=0))
+    gtp.gtp_boardsize([str(size)])
+    return gtp
+
+
+def test_play_on_an_occupied_cell_is_reported():
+    gtp = interface()
+    assert gtp.gtp_play(['w', 'c3']) == (True, "")
+    assert gtp.gtp_play(['b', 'c3']) == (False, "Cell occupied")
+    assert gtp.game.turn() == GameMeta.PLAYERS['black']
+
+
+def test_play_rejects_bad_arguments_without_playing():
+    gtp = interface()
+    assert gtp.gtp_play(['x', 'c3']) == (False, "Player not recognized")
+    assert gtp.gtp_play(['w', 'z9']) == (False, "Cell out of bounds")
+    assert gtp.gtp_play(['w', 'c']) == (False, "Malformed arguments")
+    assert gtp.game.white_played + gtp.game.black_played == 0
+
+
+def test_malformed_analysis_arguments_keep_the_turn():
+    gtp = interface()
+    assert gtp.analysis_arguments(['b', 'soon']) is None
+    assert gtp.analysis_arguments(['b', '-1']) is None
+    assert gtp.game.turn() == GameMeta.PLAYERS['white']
+    assert gtp.analysis_arguments(['b', '0.5', '3']) == (0.5, 3)
+    assert gtp.game.turn() == GameMeta.PLAYERS['black']
@@ -0,0 +1,45 @@
+from copy import deepcopy
+from random import Random
+
+from gamestate import GameState
+from inferior import pruned_moves
+from meta import GameMeta
+from solver import Solver
+
+
+def winning_moves(state: GameState, solver: Solver) -> list:
+    """
+    Moves after which the player to move still wins with perfect play.
+    """
+    to_play = state.turn()
+    moves = []
+    for move in state.moves():
+        child = deepcopy(state)
+        child.play(move)
+        if solver.solve(child)[0] == to_play:
+            moves.append(move)
+    return moves
+
+
+def test_pruning_keeps_a_winning_move():
+    rng = Random(27)
+    solver = Solver()
+    checked = single = 0
+    while checked < 30:
+        state = GameState(4)
+        moves = state.moves()
+        rng.shuffle(moves)
+        for move in moves[:rng.randint(5, 10)]:
+            state.play(move)
+        if state.winner != GameMeta.PLAYERS['none']:
+            continue
+        winning = winning_moves(state, solver)
+        if not winning:
+            continue
+        checked += 1
+        pruned = pruned_moves(state)
+        assert set(winning) & set(pruned)
+        if len(winning) == 1:
+            single += 1
+            assert winning[0] in pruned
+    assert single
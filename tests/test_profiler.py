@@ -0,0 +1,22 @@
+from agents import make_agent
+from gamestate import GameState
+from profiler import SearchProfiler
+
+
+def test_statistics_report_the_profile_only_when_profiling():
+    agent = make_agent('UCT', GameState(5), seed=0)
+    agent.search(0.2)
+    assert agent.statistics()[3] is None
+
+    agent.set_profiling(True)
+    agent.search(0.2)
+    num_rollouts, node_count, run_time, profile = agent.statistics()
+    assert num_rollouts > 0
+    assert set(profile) >= {phase + '_time' for phase in SearchProfiler.PHASES}
+    assert profile['rollout_time'] > 0 and profile['playout_length'] > 0 and profile['selection_depth'] > 0
+    assert profile['expansions_per_sec'] > 0
+
+    agent.set_profiling(False)
+    agent.search(0.2)
+    assert agent.statistics()[3] is None
+    assert 'select_node' not in vars(agent)
@@ -0,0 +1,30 @@
+import pytest
+
+from agents import compose
+from gamestate import GameState
+from meta import GameMeta
+
+WHITE, BLACK = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+
+
+@pytest.mark.parametrize('selection', ['uct', 'ucb1-tuned'])
+def test_quality_bonus_moves_losses_on_01_agents(selection):
+    agent = compose(selection, 'random', 'qb')(GameState(5), seed=0)
+    node = agent.node_class((0, 0), agent.root)
+    # a fast playout: the bonus of both players is positive
+    agent.quality.bonus[WHITE] = agent.quality.bonus[BLACK] = 0.5
+    # the player who moved into node (white at the root) loses
+    agent.backup(node, BLACK, BLACK)
+    assert node.N == 1
+    assert node.Q < 0
+    assert agent.root.Q > 1
+
+
+@pytest.mark.parametrize('selection', ['uct', 'ucb1-tuned'])
+def test_zero_bonus_keeps_plain_rewards(selection):
+    agent = compose(selection, 'random', 'qb')(GameState(5), seed=0)
+    node = agent.node_class((0, 0), agent.root)
+    agent.quality.observe(None)
+    agent.backup(node, BLACK, BLACK)
+    assert node.Q == 0
+    assert agent.root.Q == 1
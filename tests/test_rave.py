@@ -0,0 +1,47 @@
+from agents import make_agent
+from gamestate import GameState, transform_cell
+from rave_mctsagent import RaveMctsAgent
+
+
+def test_rave_children_are_created_lazily():
+    agent = RaveMctsAgent(GameState(5), seed=1)
+    for _ in range(200):
+        agent.simulate()
+    root = agent.root
+    assert len(root.children) + len(root.untried) == 25
+    # every child was visited at least once, so none was created ahead of time
+    assert all(child.N > 0 for child in root.children.values())
+
+
+def test_untried_moves_keep_their_amaf_statistics():
+    agent = RaveMctsAgent(GameState(7), seed=2)
+    for _ in range(60):
+        agent.simulate()
+    node = max(agent.root.children.values(), key=lambda n: n.N)
+    assert node.untried and node.amaf_n is not None
+    size = 7
+    move = node.untried[0]
+    cell = move[0] * size + move[1]
+    assert node.amaf_n[cell] > 0
+    expected = node.amaf_q[cell], node.amaf_n[cell]
+    # make the move the only untried one so add_child has to pick it
+    node.untried[:] = [move]
+    state = agent.copy_root_state()
+    state.play(node.move)
+    child = agent.add_child(node, state)
+    assert child.move == move
+    assert (child.Q_RAVE, child.N_RAVE) == expected
+    assert node.amaf_n is None
+
+
+def test_reroot_moves_amaf_statistics_through_the_transform():
+    agent = make_agent('RAVE', GameState(7), seed=3)
+    for _ in range(30):
+        agent.simulate()
+    root = agent.root
+    before = {(x, y): root.amaf_n[x * 7 + y] for x, y in root.untried}
+    assert any(before.values())
+    agent.reroot(root, 2)
+    for (x, y), visits in before.items():
+        tx, ty = transform_cell((x, y), 2, 7)
+        assert root.amaf_n[tx * 7 + ty] == visits
@@ -0,0 +1,158 @@
+from copy import deepcopy
+
+from agents import make_agent
+from gamestate import GameState, transform_cell
+from meta import GameMeta
+
+WHITE, BLACK, NONE = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black'], GameMeta.PLAYERS['none']
+SWAP = {WHITE: BLACK, BLACK: WHITE, NONE: NONE}
+
+
+def searched(name: str, state: GameState, simulations: int, seed: int = 0):
+    agent = make_agent(name, state, seed=seed)
+    for _ in range(simulations):
+        agent.simulate()
+    return agent
+
+
+def snapshot(node, path: tuple = ()) -> dict:
+    """
+    Statistics and winner of every node below the passed one by move path.
+    """
+    result = {path: (node.N, node.Q, node.outcome)}
+    for move, child in node.children.items():
+        result.update(snapshot(child, path + (move,)))
+    return result
+
+
+def transposed(state: GameState) -> GameState:
+    """
+    The position mirrored by transform 2, with the colours of the stones and
+    of the player to move swapped.
+    """
+    result = GameState(state.size)
+    for x in range(state.size):
+        for y in range(state.size):
+            if state.board[x, y] == WHITE:
+                result.place_black(transform_cell((x, y), 2, state.size))
+            elif state.board[x, y] == BLACK:
+                result.place_white(transform_cell((x, y), 2, state.size))
+    result.set_turn(SWAP[state.turn()])
+    return result
+
+
+def assert_legal(node, state: GameState) -> None:
+    """
+    Every child and untried move of the subtree is an empty cell when reached.
+    """
+    for move in node.untried:
+        assert state.board[move] == NONE
+    for move, child in node.children.items():
+        assert child.move == move and state.board[move] == NONE
+        child_state = deepcopy(state)
+        child_state.play(move)
+        assert_legal(child, child_state)
+
+
+def test_handicap_stone_matches_the_transposed_first_move():
+    agent = searched('UCT', GameState(5), 1500)
+    root = agent.root
+    handicap = GameState(5)
+    handicap.place_black((2, 1))
+    handicap.set_turn(WHITE)
+    # (1, 2) transposed and (3, 2) transposed after the rotation both land on (2, 1)
+    candidates = {root.children[(1, 2)]: 2, root.children[(3, 2)]: 3}
+    node, transform = agent.find_node(handicap)
+    assert candidates.get(node) == transform
+    assert node.N == max(child.N for child in candidates)
+    visits = node.N
+    agent.set_gamestate(handicap)
+    assert agent.root is node and agent.root.N == visits
+    assert any(child.untried for child in agent.root.children.values())
+    assert_legal(agent.root, agent.copy_root_state())
+
+
+def test_reroot_keeps_the_statistics_of_the_new_root():
+    agent = searched('UCT', GameState(5), 400)
+    child = max(agent.root.children.values(), key=lambda n: n.N)
+    before = snapshot(child)
+    state = agent.copy_root_state()
+    state.play(child.move)
+    agent.set_gamestate(state)
+    assert agent.root is child and child.parent is None
+    assert snapshot(agent.root) == before
+
+
+def test_transposed_reroot_maps_moves_and_winners():
+    state = GameState(4)
+    for move in ((0, 0), (1, 1), (3, 2), (2, 0), (0, 3), (1, 2)):
+        state.play(move)
+    agent = searched('UCT', state, 600, seed=1)
+    child = max(agent.root.children.values(), key=lambda n: n.N)
+    before = snapshot(child)
+    assert any(outcome != NONE for N, Q, outcome in before.values())
+    reached = agent.copy_root_state()
+    reached.play(child.move)
+
+    target = transposed(reached)
+    agent.set_gamestate(target)
+    assert agent.root is child
+    after = snapshot(agent.root)
+    assert len(after) == len(before)
+    for path, (N, Q, outcome) in before.items():
+        assert after[tuple(transform_cell(move, 2, 4) for move in path)] == (N, Q, SWAP[outcome])
+    assert_legal(agent.root, agent.copy_root_state())
+
+
+def test_policy_tables_are_reset_only_by_transformed_reuse():
+    agent = searched('LAST-GOOD-REPLY', GameState(5), 300)
+    child = max(agent.root.children.values(), key=lambda n: n.N)
+    state = agent.copy_root_state()
+    state.play(child.move)
+    replies = list(agent.white_reply)
+    assert any(reply >= 0 for reply in replies)
+    agent.set_gamestate(state)
+    assert agent.root is child and agent.white_reply == replies
+
+    grandchild = max(child.children.values(), key=lambda n: n.N)
+    state.play(grandchild.move)
+    agent.set_gamestate(transposed(state))
+    assert agent.root is grandchild
+    assert all(reply == -1 for reply in agent.white_reply + agent.black_reply)
+
+
+def test_move_sequence_walks_several_plies():
+    agent = searched('UCT', GameState(5), 1500)
+    moves, node = [], agent.root
+    for _ in range(3):
+        node = max(node.children.values(), key=lambda n: n.N)
+        moves.append(node.move)
+    before = snapshot(node)
+    agent.move_sequence(moves)
+    assert agent.root is node and node.parent is None
+    assert snapshot(agent.root) == before
+    assert agent.root_state.white_played + agent.root_state.black_played == 3
+
+
+def test_move_sequence_finds_another_move_order():
+    agent = searched('UCT', GameState(5), 1500)
+    first = max(agent.root.children.values(), key=lambda n: n.N)
+    second = max(first.children.values(), key=lambda n: n.N)
+    third = max(second.children.values(), key=lambda n: n.N)
+    # white plays the third move first; cut that path if the search made it too
+    moves = [third.move, second.move, first.move]
+    agent.root.children[third.move].children.pop(second.move, None)
+    agent.move_sequence(moves)
+    assert agent.root is third
+    assert agent.root_state.board[first.move] == agent.root_state.board[third.move] == WHITE
+    assert_legal(agent.root, agent.copy_root_state())
+
+
+def test_move_sequence_starts_over_on_an_unknown_position():
+    agent = searched('UCT', GameState(5), 50)
+    root = agent.root
+    # 50 simulations on 25 cells do not reach four plies deep
+    moves = [(0, 0), (4, 4), (2, 2), (1, 3)]
+    agent.move_sequence(moves)
+    assert agent.root is not root and agent.root.N == 0 and not agent.root.children
+    assert [agent.root_state.board[move] for move in moves] == [WHITE, BLACK, WHITE, BLACK]
@@ -0,0 +1,93 @@
+from agents import make_agent
+from gamestate import GameState
+from meta import GameMeta, MCTSMeta
+
+WHITE, BLACK = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+SIZE = 5
+CELLS = SIZE * SIZE
+
+
+def recorded_playout(agent, state: GameState) -> list:
+    """
+    Play one rollout from the passed state and return its moves as cell ids.
+    """
+    sequences = []
+    update_replies = agent.update_replies
+    agent.update_replies = lambda sequence, *args: (sequences.append(sequence), update_replies(sequence, *args))
+    agent.roll_out(state)
+    del agent.update_replies
+    return sequences[0]
+
+
+def test_winning_playout_stores_its_replies():
+    agent = make_agent('LAST-GOOD-REPLY', GameState(SIZE), seed=0)
+    agent.update_replies([3, 7, 12, 4], WHITE, BLACK, CELLS)
+    assert agent.black_reply[3] == 7 and agent.black_reply[12] == 4
+    assert agent.white_reply[7] == -1
+
+
+def test_losing_playout_forgets_its_replies_with_lgrf():
+    for name, forgotten in (('LAST-GOOD-REPLY', False), ('LGRF-2', True)):
+        agent = make_agent(name, GameState(SIZE), seed=0)
+        agent.update_replies([3, 7, 12], WHITE, BLACK, CELLS)
+        assert agent.black_reply[3] == 7
+        agent.update_replies([3, 7, 12], WHITE, WHITE, CELLS)
+        assert agent.white_reply[7] == 12
+        assert (agent.black_reply[3] == -1) == forgotten
+    assert agent.black_reply2 == [-1] * (CELLS * CELLS)
+    assert agent.white_reply2[3 * CELLS + 7] == 12
+
+
+def test_reply_to_the_last_two_moves_comes_first(monkeypatch):
+    monkeypatch.setattr(MCTSMeta, 'RANDOMNESS', 1)
+    agent = make_agent('LGRF-2', GameState(SIZE), seed=1)
+    agent.white_reply[:] = [20] * CELLS
+    agent.black_reply[:] = [21] * CELLS
+    agent.white_reply2[:] = [22] * (CELLS * CELLS)
+    agent.black_reply2[:] = [23] * (CELLS * CELLS)
+    sequence = recorded_playout(agent, GameState(SIZE))
+    # the first move has no previous move to reply to
+    assert sequence[0] not in (20, 21, 22, 23)
+    assert sequence[1:4] == [21, 22, 23]
+
+
+def test_reply_on_an_occupied_cell_is_skipped(monkeypatch):
+    monkeypatch.setattr(MCTSMeta, 'RANDOMNESS', 1)
+    agent = make_agent('LGRF-2', GameState(SIZE), seed=2)
+    state = GameState(SIZE)
+    state.play(divmod(22, SIZE))
+    state.play(divmod(23, SIZE))
+    agent.white_reply[:] = [20] * CELLS
+    agent.black_reply[:] = [21] * CELLS
+    agent.white_reply2[:] = [22] * (CELLS * CELLS)
+    agent.black_reply2[:] = [23] * (CELLS * CELLS)
+    sequence = recorded_playout(agent, state)
+    assert sequence[0] not in (20, 21)
+    # the replies to two moves are taken, white falls back to its reply to one
+    assert sequence[1:3] == [21, 20]
+
+
+def test_pool_ranks_only_cells_with_a_score():
+    agent = make_agent('POOLRAVE', GameState(SIZE), seed=0)
+    agent.black_rave[1, 1], agent.black_count[1, 1] = 3, 4
+    agent.black_rave[2, 3], agent.black_count[2, 3] = -2, 6
+    agent.black_rave[4, 0], agent.black_count[4, 0] = 0, 2
+    agent.refresh_rankings()
+    # cells never played by black rank nowhere, not above the negative score
+    assert agent.black_ranking == [(1, 1), (4, 0), (2, 3)]
+    assert agent.white_ranking == []
+    legal = {move: i for i, move in enumerate(GameState(SIZE).moves()) if move != (1, 1)}
+    assert agent.pool(agent.black_ranking, legal) == [(4, 0), (2, 3)]
+
+
+def test_pool_after_rollouts_is_sorted_by_score():
+    agent = make_agent('POOLRAVE', GameState(SIZE), seed=3)
+    for _ in range(MCTSMeta.POOLRAVE_REFRESH):
+        agent.roll_out(GameState(SIZE))
+    agent.refresh_rankings()
+    for scores, counts, ranking in ((agent.black_rave, agent.black_count, agent.black_ranking),
+                                    (agent.white_rave, agent.white_count, agent.white_ranking)):
+        played = [(x, y) for x in range(SIZE) for y in range(SIZE) if counts[x, y] > 0]
+        assert sorted(ranking) == played
+        assert [scores[cell] for cell in ranking] == sorted((scores[cell] for cell in ranking), reverse=True)
+        assert any(scores[cell] < 0 for cell in ranking)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from runningstats import RunningStats
+
+
+def stream(length: int = 500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # a drifting stream makes the window and the decay matter
+    return (rng.normal(0, 1, length) + np.linspace(0, 5, length)).tolist()
+
+
+def test_mean_and_variance_of_the_whole_stream():
+    samples = stream()
+    stats = RunningStats()
+    for i, x in enumerate(samples, 1):
+        stats.push(x)
+        assert stats.mean == pytest.approx(np.mean(samples[:i]))
+        assert stats.variance == pytest.approx(np.var(samples[:i]), abs=1e-9)
+    assert stats.n == len(samples)
+    assert stats.std == pytest.approx(np.std(samples))
+
+
+@pytest.mark.parametrize('window', [1, 2, 25])
+def test_mean_and_variance_of_a_window(window):
+    samples = stream()
+    stats = RunningStats(window=window)
+    for i, x in enumerate(samples, 1):
+        stats.push(x)
+        recent = samples[max(0, i - window):i]
+        assert stats.n == len(recent)
+        assert stats.mean == pytest.approx(np.mean(recent))
+        assert stats.variance == pytest.approx(np.var(recent), abs=1e-9)
+
+
+@pytest.mark.parametrize('decay', [0.01, 0.1, 0.5])
+def test_mean_and_variance_with_decay(decay):
+    samples = stream()
+    stats = RunningStats(decay=decay)
+    for i, x in enumerate(samples, 1):
+        stats.push(x)
+        # the first sample keeps the weight the later ones have taken from it
+        weights = decay * (1 - decay) ** np.arange(i - 1, -1, -1)
+        weights[0] = (1 - decay) ** (i - 1)
+        mean = np.average(samples[:i], weights=weights)
+        assert stats.mean == pytest.approx(mean)
+        assert stats.variance == pytest.approx(np.average((np.array(samples[:i]) - mean) ** 2, weights=weights))
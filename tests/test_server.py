@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from server import Game, GameServer
+from meta import GameMeta
+
+
+def test_rejected_play_keeps_the_player_to_move():
+    game = Game('UCT', 5, 0.1)
+    assert GameServer.play(game, {'colour': 'w', 'cell': 'a1'})['ok']
+    assert game.state.turn() == GameMeta.PLAYERS['black']
+    reply = GameServer.play(game, {'colour': 'w', 'cell': 'a1'})
+    assert reply == {'ok': False, 'error': 'Cell occupied'}
+    assert game.state.turn() == GameMeta.PLAYERS['black']
+
+
+def new_game(server, **request):
+    return asyncio.run(server.execute(dict(request, command='new')))
+
+
+@pytest.mark.parametrize('size', [0, -3, 27, 10 ** 6, 'x', None, [5]])
+def test_new_game_rejects_invalid_sizes(size):
+    server = GameServer(workers=1)
+    assert new_game(server, size=size) == {'ok': False, 'error': 'Argument is not a valid size'}
+    assert not server.games
+
+
+def test_new_game_respects_max_size():
+    server = GameServer(workers=1, max_size=9)
+    assert not new_game(server, size=11)['ok']
+    assert new_game(server, size=9)['ok']
+
+
+@pytest.mark.parametrize('time', [0, -5, 'nan', 'inf', 'fast', None])
+def test_new_game_rejects_invalid_times(time):
+    server = GameServer(workers=1)
+    assert new_game(server, size=5, time=time) == {'ok': False, 'error': 'Argument is not a valid time'}
+
+
+@pytest.mark.parametrize('budget', [0, -1, 'nan', float('inf'), 'all'])
+def test_new_game_rejects_invalid_budgets(budget):
+    server = GameServer(workers=1)
+    assert new_game(server, size=5, budget=budget) == {'ok': False, 'error': 'Argument is not a valid budget'}
+
+
+def test_new_game_caps_the_move_time():
+    server = GameServer(workers=1, max_time=2)
+    reply = new_game(server, size=5, time=60, budget=10)
+    assert reply['ok']
+    game = server.games[reply['game']]
+    assert game.move_time == 2 and game.budget == 10
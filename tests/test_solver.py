@@ -0,0 +1,56 @@
+from copy import deepcopy
+from random import Random
+
+import pytest
+
+from gamestate import GameState
+from meta import GameMeta
+from solver import Solver
+
+
+def exhaustive_winner(state: GameState, seen: dict = None) -> int:
+    """
+    Winner of the position found by trying every line of play, positions met
+    again through another move order are looked up in seen.
+    """
+    seen = {} if seen is None else seen
+    key = state.board.tobytes(), state.turn()
+    if key not in seen:
+        winner = state.winner
+        if winner == GameMeta.PLAYERS['none']:
+            to_play = state.turn()
+            winner = GameMeta.PLAYERS['black'] if to_play == GameMeta.PLAYERS['white'] else GameMeta.PLAYERS['white']
+            for move in state.moves():
+                child = deepcopy(state)
+                child.play(move)
+                if exhaustive_winner(child, seen) == to_play:
+                    winner = to_play
+                    break
+        seen[key] = winner
+    return seen[key]
+
+
+def random_position(size: int, empty: int, rng: Random) -> GameState:
+    state = GameState(size)
+    moves = state.moves()
+    rng.shuffle(moves)
+    for move in moves[:size * size - empty]:
+        state.play(move)
+        if state.winner != GameMeta.PLAYERS['none']:
+            break
+    return state
+
+
+@pytest.mark.parametrize('size, empty', [(3, 7), (3, 5), (4, 7), (4, 5)])
+def test_solver_agrees_with_exhaustive_search(size, empty):
+    rng = Random(size * 100 + empty)
+    solver = Solver()
+    for _ in range(10):
+        state = random_position(size, empty, rng)
+        winner, move = solver.solve(state)
+        assert winner == exhaustive_winner(state)
+        if move is not None:
+            assert winner == state.turn()
+            child = deepcopy(state)
+            child.play(move)
+            assert exhaustive_winner(child) == winner
@@ -0,0 +1,50 @@
+from math import inf, isfinite, log
+
+import pytest
+
+from sprt import SPRT, elo, elo_interval, expected_score, los
+
+
+def test_elo_of_known_scores():
+    assert elo(0.5) == 0
+    assert elo(0.75) == pytest.approx(190.85, abs=0.01)
+    assert elo(0.25) == pytest.approx(-190.85, abs=0.01)
+    assert elo(0) == -inf and elo(1) == inf
+    assert expected_score(400) == pytest.approx(10 / 11)
+
+
+@pytest.mark.parametrize('difference', [-400, -50, 0, 35, 200])
+def test_expected_score_inverts_elo(difference):
+    assert elo(expected_score(difference)) == pytest.approx(difference)
+
+
+@pytest.mark.parametrize('wins, losses', [(0, 10), (10, 0), (0, 1), (3, 7), (50, 50)])
+def test_elo_interval_is_finite_and_ordered(wins, losses):
+    estimate, lower, upper = elo_interval(wins, losses)
+    assert all(isfinite(value) for value in (estimate, lower, upper))
+    assert lower < estimate < upper
+
+
+def test_elo_interval_of_even_results():
+    estimate, lower, upper = elo_interval(50, 50)
+    assert estimate == 0
+    assert lower == pytest.approx(-upper)
+    assert elo_interval(0, 0) == (0.0, -inf, inf)
+
+
+def test_los_of_known_results():
+    assert los(0, 0) == 0.5
+    assert los(10, 10) == 0.5
+    assert los(60, 40) == pytest.approx(0.9772, abs=1e-4)
+    assert los(40, 60) == pytest.approx(1 - los(60, 40))
+
+
+def test_sprt_verdicts():
+    test = SPRT(elo0=0, elo1=50, alpha=0.05, beta=0.05)
+    assert test.upper == pytest.approx(log(19))
+    assert test.lower == pytest.approx(-log(19))
+    assert test.llr(0, 0) == 0
+    assert test.verdict(0, 0) is None
+    assert test.verdict(10, 10) is None
+    assert test.verdict(100, 50) == 'H1'
+    assert test.verdict(50, 100) == 'H0'
@@ -0,0 +1,40 @@
+import json
+
+from tournament import load_log, tournament
+
+
+def run(log, game_number: int = 4, played: list = None) -> dict:
+    callback = None if played is None else lambda i, record, summary: played.append(i)
+    return tournament('UCT', 'UCT', game_number, movetime=0.01, size=3, workers=1, seed=7,
+                      callback=callback, log=str(log))
+
+
+def test_load_log_skips_a_truncated_last_line(tmp_path):
+    log = tmp_path / 'tournament.jsonl'
+    log.write_text(json.dumps({'tournament': {'agent1': 'UCT'}}) + '\n'
+                   + json.dumps({'game': 0, 'winner': 1}) + '\n'
+                   + json.dumps({'game': 1, 'winner': 2}) + '\n'
+                   + '{"game": 2, "moves": ["a1", "b')
+    settings, records = load_log(str(log))
+    assert settings == {'agent1': 'UCT'}
+    assert [record['game'] for record in records] == [0, 1]
+
+
+def test_resumed_tournament_plays_only_the_missing_games(tmp_path):
+    log = tmp_path / 'tournament.jsonl'
+    first = run(log)
+    lines = log.read_text().splitlines()
+    assert len(lines) == 5
+    # keep the settings and games 0 and 2, and leave game 3 cut short by a crash
+    kept = [line for line in lines[1:] if json.loads(line)['game'] in (0, 2)]
+    log.write_text('\n'.join([lines[0]] + kept + [lines[4][:20]]))
+
+    played = []
+    result = run(log, played=played)
+    assert played == [1, 3]
+    assert [record['game'] for record in result['records']] == [0, 1, 2, 3]
+    assert [record['first'] for record in result['records']] == [1, 2, 1, 2]
+    assert [record['colour'] for record in result['records']] == ['w', 'b', 'w', 'b']
+    assert result['records'][0] == first['records'][0] and result['records'][2] == first['records'][2]
+    assert all(record['moves'] for record in result['records'])
+    assert len(load_log(str(log))[1]) == 4
@@ -0,0 +1,41 @@
+from copy import deepcopy
+
+import pytest
+
+from agents import make_agent
+from gamestate import GameState
+from meta import MCTSMeta
+
+
+def walk(node, state: GameState):
+    """
+    Yield every expanded node of the subtree with its position.
+    """
+    if node.children or node.untried:
+        yield node, state
+    for move, child in node.children.items():
+        child_state = deepcopy(state)
+        child_state.play(move)
+        yield from walk(child, child_state)
+
+
+@pytest.mark.parametrize('name', ['UCT', 'UCB1-TUNED'])
+def test_widening_opens_children_by_prior_as_visits_grow(name):
+    state = GameState(7)
+    for move in ((3, 3), (2, 4), (4, 2)):
+        state.play(move)
+    agent = make_agent(name, state, seed=0)
+    agent.widening = True
+    for _ in range(800):
+        agent.simulate()
+    checked = 0
+    for node, position in walk(agent.root, agent.copy_root_state()):
+        assert len(node.children) <= 1 + MCTSMeta.WIDENING_CONST * node.N ** MCTSMeta.WIDENING_EXPONENT
+        if node.untried:
+            opened = min(agent.move_prior(position, move) for move in node.children) if node.children else 1.0
+            assert opened >= max(agent.move_prior(position, move) for move in node.untried)
+            checked += 1
+    assert checked > 10
+    root = agent.root
+    # the root has taken most of the visits and opened its best moves only
+    assert 1 < len(root.children) < 45
@@ -1,6 +1,17 @@
-from meta import GameMeta
+import argparse
+import json
+import os
 import sys
-import time
+from multiprocessing import Pool
+from queue import Queue
+from time import time as clock
+
+from numpy.random import SeedSequence
+
+from agents import make_agent
+from gtp import GTPInterface
+from meta import GameMeta
+from sprt import SPRT, elo_interval, los
 
 
 def print_game(game):
@@ -9,102 +20,290 @@ def print_game(game):
     print()
 
 
-def tournament(interface1, interface2, game_number=100, movetime=10, size=8, opening_moves=[]):
+def play_game(agent1: str, agent2: str, first: int, movetime: float = 10, size: int = 8,
+              opening_moves: list = (), seeds: tuple = (None, None)) -> dict:
     """
-    Run some number of games between two agents, alternating who has first move
-    each time. Return the winrate for the first of the two agents. Print games
-    played along the way.
+    Play one game between two agents, each behind its own GTP interface, and
+    return its record. This runs inside the worker processes of tournament().
+
+    Args:
+        agent1: name of the first agent, see agents.make_agent
+        agent2: name of the second agent
+        first: the agent (1 or 2) which makes the first move
+        movetime: seconds of search per move
+        size: board size
+        opening_moves: cells (e.g. "a1") played before the agents take over
+        seeds: seeds of the random streams of the two agents
+
+    Returns:
+        dict: the moves, the colour of agent 1, the winning agent and the
+              rollouts and seconds of every generated move
     """
-    begin = time.clock()
-    p1_score = 0  # score for player 1
-    p2_score = 0  # score for player 2
-    interface1.gtp_time([movetime])
-    interface2.gtp_time([movetime])
-    interface1.gtp_boardsize([size])
-    interface2.gtp_boardsize([size])
-    rollouts_1 = 0
-    genmove_calls_1 = 0
-    list_of_rollouts = []
-    print('Tournament Started ...')
-    print("%a games will be running between agents ..." % game_number)
-    for i in range(game_number):
-        interface1.gtp_clear([])
-        interface2.gtp_clear([])
-        turn = interface1.game.turn()
-        c1 = 'w' if turn == GameMeta.PLAYERS["white"] else 'b'
-        c2 = 'b' if turn == GameMeta.PLAYERS["white"] else 'w'
-        game = []
-
-        rollouts_2 = 0
-        genmove_calls_2 = 0
-
-        if i % 2 == 0:
-            while interface1.gtp_winner([])[1] == "none":
-                move = interface1.gtp_genmove([c1])
-                rollouts_1 += move[2]
-                genmove_calls_1 += 1
-                list_of_rollouts.append(move[2])
-                if move[0]:
-                    interface2.gtp_play([c1, move[1]])
-                    game.append(move[1])
-                move = interface2.gtp_genmove([c2])
-                rollouts_1 += move[2]
-                genmove_calls_1 += 1
-                list_of_rollouts.append(move[2])
-                if move[0]:
-                    interface1.gtp_play([c2, move[1]])
-                    game.append(move[1])
-
-            # print(interface1.gtp_show([])[1])
-            if interface1.gtp_winner([])[1][0] == c1:
-                p1_score += 1
-                print("GAME OVER, WINNER : PLAYER 1 (" + c1 + ")\n")
-                print("Games played =  [ %i   /  %g ]" % (i + 1, game_number))
-                print("Wins   |  Player 1 =  [%a]  |  Player 2 = [%s]  " % (p1_score, p2_score))
-            else:
-                p2_score += 1
-                print("GAME OVER, WINNER : PLAYER 2 (" + c2 + ")\n")
-                print("Games played =  [ %i   /  %g ] " % (i + 1, game_number))
-                print("Wins   |  Player 1 =  [%a] |  Player 2 = [%s]  " % (p1_score, p2_score))
-
-        else:
-            while interface1.gtp_winner([])[1] == "none":
-                move = interface2.gtp_genmove([c1])
-                rollouts_1 += move[2]
-                genmove_calls_1 += 1
-                list_of_rollouts.append(move[2])
-                if move[0]:
-                    interface1.gtp_play([c1, move[1]])
-                    game.append(move[1])
-                move = interface1.gtp_genmove([c2])
-                rollouts_1 += move[2]
-                genmove_calls_1 += 1
-                list_of_rollouts.append(move[2])
-                if move[0]:
-                    interface2.gtp_play([c2, move[1]])
-                    game.append(move[1])
-
-            # print(interface1.gtp_show([])[1])
-            if interface1.gtp_winner([])[1][0] == c2:
-                p1_score += 1
-                print("GAME OVER, WINNER : PLAYER 1 (" + c2 + ")\n")
-                print("Games played =  [ %i   /  %g ] " % (i + 1, game_number))
-                print("Wins   |  Player 1 =  [%a]  |  Player 2 = [%s]  " % (p1_score, p2_score))
+    interfaces = {1: GTPInterface(make_agent(agent1, seed=seeds[0])),
+                  2: GTPInterface(make_agent(agent2, seed=seeds[1]))}
+    for interface in interfaces.values():
+        interface.gtp_boardsize([size])
+        interface.move_time = movetime
+
+    turn = interfaces[1].game.turn()
+    colours = {first: 'w' if turn == GameMeta.PLAYERS["white"] else 'b'}
+    colours[3 - first] = 'b' if colours[first] == 'w' else 'w'
+    game = []
+    rollouts = []
+    times = []
+
+    to_move = first
+    for cell in opening_moves:
+        for interface in interfaces.values():
+            interface.gtp_play([colours[to_move], cell])
+        game.append(cell)
+        to_move = 3 - to_move
+
+    while interfaces[1].gtp_winner([])[1] == "none":
+        start = clock()
+        move = interfaces[to_move].gtp_genmove([colours[to_move]])
+        times.append(clock() - start)
+        rollouts.append(move[2])
+        if not move[0]:
+            break
+        interfaces[3 - to_move].gtp_play([colours[to_move], move[1]])
+        game.append(move[1])
+        to_move = 3 - to_move
+
+    winner = interfaces[1].gtp_winner([])[1][0]
+    return {'moves': game, 'colour': colours[1], 'first': first,
+            'winner': 1 if winner == colours[1] else 2,
+            'rollouts': rollouts, 'times': times}
+
+
+def summarize(records: list, elapsed: float = 0.0, sprt: SPRT = None) -> dict:
+    """
+    Aggregate game records into win counts, win rates and search statistics.
+
+    Args:
+        records: results of play_game
+        elapsed: wall clock seconds of the tournament
+        sprt: sequential test whose state is reported, if any
+
+    Returns:
+        dict: games, wins and win rate of each agent, Elo difference of the first
+              agent with its 95% interval and LOS, the log-likelihood ratio and
+              verdict of the test, rollouts per move (average, max, min), win
+              rate of the first player to move, average game length, average
+              seconds per move and the elapsed time
+    """
+    games = len(records)
+    p1_score = sum(1 for record in records if record['winner'] == 1)
+    first_wins = sum(1 for record in records if record['winner'] == record['first'])
+    list_of_rollouts = [r for record in records for r in record['rollouts'] if r != 0]
+    times = [t for record in records for t in record['times']]
+    return {'games': games,
+            'p1_score': p1_score,
+            'p2_score': games - p1_score,
+            'p1_rate': p1_score / games if games else 0.0,
+            'elo': elo_interval(p1_score, games - p1_score),
+            'los': los(p1_score, games - p1_score),
+            'llr': sprt.llr(p1_score, games - p1_score) if sprt is not None else None,
+            'verdict': sprt.verdict(p1_score, games - p1_score) if sprt is not None else None,
+            'rollouts': (round(sum(list_of_rollouts) / len(list_of_rollouts)) if list_of_rollouts else 0,
+                         max(list_of_rollouts, default=0),
+                         min(list_of_rollouts, default=0)),
+            'first_rate': first_wins / games if games else 0.0,
+            'game_length': sum(len(record['moves']) for record in records) / games if games else 0.0,
+            'move_time': sum(times) / len(times) if times else 0.0,
+            'elapsed': elapsed}
+
+
+def load_log(path: str) -> tuple:
+    """
+    Read a tournament log: a JSON-lines file whose first line holds the settings
+    of the tournament and every further line the record of one finished game.
+    A last line cut short by a crash is ignored.
+
+    Returns:
+        tuple: (settings, records)
+    """
+    settings, records = None, []
+    with open(path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if 'tournament' in entry:
+                settings = entry['tournament']
             else:
-                p2_score += 1
-                print("GAME OVER, WINNER : PLAYER 2 (" + c1 + ")\n")
-                print("Games played =  [ %i   /  %g ] " % (i + 1, game_number))
-                print("Wins   |  Player 1 =  [%a] |  Player 2 = [%s]  " % (p1_score, p2_score))
-        sys.stdout.flush()  # flush buffer so intermediate results can be viewed
-    list_of_rollouts = list(filter(lambda a: a != 0, list_of_rollouts))
-    p1 = (p1_score / game_number) * 100
-    p2 = (p2_score / game_number) * 100
-    rollouts_info = (round(sum(list_of_rollouts) / len(list_of_rollouts)),
-                     max(list_of_rollouts),
-                     min(list_of_rollouts))
-    print('\n\n\n')
-    print('player 1 wins = ', p1, ' %')
-    print('player 2 wins = ', p2, ' %')
-    print("Average Simulations = [ %a ] " % (rollouts_1 / genmove_calls_1))
-    print('Finished in %i seconds' % (time.clock() - begin))
-    return p1_score, p2_score, rollouts_info, time.clock() - begin
+                records.append(entry)
+    return settings, records
+
+
+def append_log(file, entry: dict) -> None:
+    """
+    Append one JSON line to the open log and push it to the disk.
+    """
+    file.write(json.dumps(entry) + '\n')
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def tournament(agent1: str, agent2: str, game_number: int = 100, movetime: float = 10, size: int = 8,
+               opening_moves: list = (), workers: int = None, seed=None, callback=None,
+               sprt: SPRT = None, log: str = None) -> dict:
+    """
+    Run some number of games between two agents, alternating who has first move
+    each game so every pair of games is played with both colours. Independent
+    games are farmed out to a pool of worker processes, each game with its own
+    agent instances and seeds; results are handed to the callback as they finish.
+    With a sequential test the tournament stops as soon as the test reaches a
+    verdict, game_number then only bounds its length; games still running at
+    that point are abandoned and their worker processes terminated.
+    With a log every finished game is appended to it as a JSON line (see
+    load_log) and a tournament interrupted for any reason is resumed from it:
+    the games already in the log are kept and only the others are played, with
+    the same seeds they would have had.
+
+    Args:
+        agent1: name of the first agent, see agents.make_agent
+        agent2: name of the second agent
+        game_number: number of games
+        movetime: seconds of search per move
+        size: board size
+        opening_moves: cells played at the start of every game
+        workers: number of worker processes, all cores by default; 1 plays the
+                 games in this process
+        seed: seed the seeds of all the agents are derived from, None for fresh entropy
+        callback: called with (index, record, summary) after every finished game
+        sprt: sequential test of the first agent against the second
+        log: path of the JSON-lines log of the tournament
+
+    Returns:
+        dict: summarize() of all the games, with the list of their records
+    """
+    workers = workers or os.cpu_count() or 1
+    seed_sequence = SeedSequence(seed)
+    settings = {'agent1': agent1, 'agent2': agent2, 'movetime': movetime, 'size': size,
+                'opening_moves': list(opening_moves), 'entropy': seed_sequence.entropy}
+    records = []
+    log_file = None
+    if log is not None:
+        if os.path.exists(log):
+            logged, records = load_log(log)
+            if logged is not None:
+                if any(logged[key] != value for key, value in settings.items() if key != 'entropy'):
+                    raise ValueError("The log %s belongs to another tournament" % log)
+                seed_sequence = SeedSequence(logged['entropy'])
+        log_file = open(log, 'a')
+        if log_file.tell() > 0:
+            # end a line cut short by a crash so the next record starts afresh
+            with open(log, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b'\n':
+                    log_file.write('\n')
+        if not records:
+            settings['entropy'] = seed_sequence.entropy
+            append_log(log_file, {'tournament': settings})
+    seeds = seed_sequence.spawn(2 * game_number)
+    played = {record['game'] for record in records}
+    todo = [i for i in range(game_number) if i not in played]
+    begin = clock()
+
+    def arguments(i):
+        # the first agent moves first in even games and second in odd games
+        return agent1, agent2, 1 if i % 2 == 0 else 2, movetime, size, list(opening_moves), \
+            (seeds[2 * i], seeds[2 * i + 1])
+
+    def finish(i, record):
+        """
+        Record a finished game, return whether the tournament is decided.
+        """
+        record['game'] = i
+        records.append(record)
+        if log_file is not None:
+            append_log(log_file, record)
+        summary = summarize(records, clock() - begin, sprt)
+        if callback is not None:
+            callback(i, record, summary)
+        return summary['verdict'] is not None
+
+    # a resumed tournament may already be decided
+    decided = summarize(records, 0.0, sprt)['verdict'] is not None
+    if workers == 1:
+        for i in todo:
+            if decided:
+                break
+            decided = finish(i, play_game(*arguments(i)))
+    elif not decided:
+        finished = Queue()
+        pending = 0
+        todo.reverse()
+        # leaving the block terminates the workers, with any game still running
+        with Pool(workers) as pool:
+            while not decided and (todo or pending):
+                # keep every worker busy without queueing all the games at once
+                while todo and pending < workers:
+                    i = todo.pop()
+                    pool.apply_async(play_game, arguments(i),
+                                     callback=lambda record, i=i: finished.put((i, record)),
+                                     error_callback=lambda error, i=i: finished.put((i, error)))
+                    pending += 1
+                i, record = finished.get()
+                pending -= 1
+                if isinstance(record, BaseException):
+                    raise record
+                decided = finish(i, record)
+    if log_file is not None:
+        log_file.close()
+
+    records.sort(key=lambda record: record['game'])
+    result = summarize(records, clock() - begin, sprt)
+    result['records'] = records
+    return result
+
+
+def print_progress(i: int, record: dict, summary: dict) -> None:
+    """
+    Callback of tournament() printing every finished game.
+    """
+    print("GAME %i OVER, WINNER : PLAYER %i (%s)" % (i + 1, record['winner'],
+                                                       record['colour'] if record['winner'] == 1 else
+                                                       'b' if record['colour'] == 'w' else 'w'))
+    print("Games played =  [ %i ]  |  Wins   |  Player 1 =  [%a]  |  Player 2 = [%a]"
+          % (summary['games'], summary['p1_score'], summary['p2_score']))
+    print("Elo = %.1f [%.1f, %.1f]  |  LOS = %.1f %%" % (summary['elo'] + (summary['los'] * 100,)))
+    if summary['verdict'] is not None:
+        print("SPRT verdict : %s (LLR = %.2f)" % (summary['verdict'], summary['llr']))
+    sys.stdout.flush()  # flush buffer so intermediate results can be viewed
+
+
+def main(argv: list = None) -> None:
+    """
+    Print the statistics of the tournament logs passed on the command line,
+    without replaying any game, e.g.
+
+        python tournament.py results/tournament_0.jsonl --elo0 0 --elo1 50
+    """
+    parser = argparse.ArgumentParser(description='Summarize tournament logs.')
+    parser.add_argument('logs', nargs='+', help='JSON-lines tournament logs')
+    parser.add_argument('--elo0', type=float, help='Elo of H0 to report the SPRT state')
+    parser.add_argument('--elo1', type=float, help='Elo of H1 to report the SPRT state')
+    args = parser.parse_args(argv)
+    sprt = SPRT(args.elo0, args.elo1) if args.elo0 is not None and args.elo1 is not None else None
+    for path in args.logs:
+        settings, records = load_log(path)
+        summary = summarize(records, sum(t for record in records for t in record['times']), sprt)
+        print(path)
+        if settings is not None:
+            print('  %s vs %s, size %a, %a s per move' % (settings['agent1'], settings['agent2'], settings['size'],
+                                                          settings['movetime']))
+        print('  games = %a  |  player 1 = %a  |  player 2 = %a  |  first player wins %.1f %%'
+              % (summary['games'], summary['p1_score'], summary['p2_score'], summary['first_rate'] * 100))
+        print('  Elo = %.1f [%.1f, %.1f]  |  LOS = %.1f %%' % (summary['elo'] + (summary['los'] * 100,)))
+        if sprt is not None:
+            print('  LLR = %.2f [%.2f, %.2f]  |  verdict = %s' % (summary['llr'], sprt.lower, sprt.upper,
+                                                               summary['verdict']))
+        print('  moves per game = %.1f  |  rollouts per move = avg %a max %a min %a  |  %.2f s per move'
+              % ((summary['game_length'],) + summary['rollouts'] + (summary['move_time'],)))
+
+
+if __name__ == "__main__":
+    main()
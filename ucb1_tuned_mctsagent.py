@@ -1,7 +1,7 @@
 from math import sqrt, log
-from copy import deepcopy
+
+from numpy import array, sqrt as np_sqrt, minimum, flatnonzero
 from uct_mcstsagent import Node, UctMctsAgent
-from gamestate import GameState
 from meta import *
 
 
@@ -11,24 +11,29 @@ class UCB1TunedNode(Node):
     stats for the associated game position, children, parent and outcome
     (outcome==none unless the position ends the game).
     """
+    __slots__ = ()
+
     @property
-    def value(self, explore: float = MCTSMeta.EXPLORATION) -> float:
+    def value(self, explore: float = MCTSMeta.EXPLORATION, bias: float = MCTSMeta.BIAS_CONST) -> float:
         """
         Calculate the UCT value of this node relative to its parent, the parameter
         "explore" specifies how much the value should favor nodes that have
         yet to be thoroughly explored versus nodes that seem to have a high win
         rate.
-        Currently explore is set to one.
+        The variance bound uses the sample variance of the rewards (from Q2), so it
+        also holds for non-binary rewards such as quality-based ones. The
+        progressive bias term adds the prior of the move, fading as the node gets
+        visits.
 
         """
         # if the node is not visited, set the value as infinity.
         if self.N == 0:
-            return 0 if explore is 0 else GameMeta.INF
+            return 0 if explore == 0 else GameMeta.INF
         else:
             avg = self.Q / self.N
-            variance = avg * (1 - avg)
-            return avg + explore * sqrt(log(self.parent.N) / self.N) * min(0.25, variance + sqrt(
-                2 * log(self.parent.N) / self.N))
+            log_n = log(self.parent.N)
+            variance = self.Q2 / self.N - avg * avg + sqrt(2 * log_n / self.N)
+            return avg + explore * sqrt(log_n / self.N * min(0.25, variance)) + bias * self.prior / (self.N + 1)
 
 
 class UCB1TunedMctsAgent(UctMctsAgent):
@@ -36,56 +41,28 @@ class UCB1TunedMctsAgent(UctMctsAgent):
     Implementation of an agent that preforms MCTS for hex with UCB1-Tuned evaluation.
 
     """
-    def __init__(self, state=GameState(8)):
-        self.root_state = deepcopy(state)
-        self.root = UCB1TunedNode()
-        self.run_time = 0
-        self.node_count = 0
-        self.num_rollouts = 0
-
-    @staticmethod
-    def expand(parent: Node, state: GameState) -> bool:
-        """
-        Generate the children of the passed "parent" node based on the available
-        moves in the passed gamestate and add them to the tree. hrth
-
-        """
-        children = []
-        if state.winner != GameMeta.PLAYERS['none']:
-            # game is over at this node so nothing to expand
-            return False
-
-        for move in state.moves():
-            children.append(UCB1TunedNode(move, parent))
-
-        parent.add_children(children)
-        return True
-
-    def move(self, move: tuple) -> None:
-        """
-        Make the passed move and update the tree appropriately. It is
-      designed to let the player choose an action manually (which might
-      not be the best action).
+    node_class = UCB1TunedNode
 
+    def select_child(self, node: Node, children: list) -> Node:
         """
-        if move in self.root.children:
-            child = self.root.children[move]
-            child.parent = None
-            self.root = child
-            self.root_state.play(child.move)
-            return
-
-        # if for whatever reason the move is not in the children of
-        # the root just throw out the tree and start over
-        self.root_state.play(move)
-        self.root = UCB1TunedNode()
+        Return the child of the passed node with the highest UCB1-Tuned value,
+        scoring all children in one array expression instead of evaluating the
+        value property of each child.
 
-    def set_gamestate(self, state: GameMeta) -> None:
         """
-        Set the root_state of the tree to the passed gamestate, this clears all
-        the information stored in the tree since none of it applies to the new
-        state.
+        visits = array([n.N for n in children], dtype=float)
+        unvisited = flatnonzero(visits == 0)
+        if len(unvisited) > 0:
+            # unvisited children have an infinite value
+            return children[self.rng.choice(unvisited)]
 
-        """
-        self.root_state = deepcopy(state)
-        self.root = UCB1TunedNode()
+        rewards = array([n.Q for n in children], dtype=float)
+        squares = array([n.Q2 for n in children], dtype=float)
+        avg = rewards / visits
+        log_n = log(node.N)
+        variance = squares / visits - avg * avg + np_sqrt(2 * log_n / visits)
+        values = avg + MCTSMeta.EXPLORATION * np_sqrt(log_n / visits * minimum(0.25, variance))
+        if self.widening:
+            values += MCTSMeta.BIAS_CONST * array([n.prior for n in children]) / (visits + 1)
+        # descend to the maximum value node, break ties at random
+        return children[self.rng.choice(flatnonzero(values == values.max()))]
@@ -1,10 +1,30 @@
+import gc
 from math import sqrt, log
 from copy import deepcopy
+from heapq import nlargest
 from queue import Queue
-from random import choice
 from time import time as clock
+from weakref import ref
 from meta import GameMeta, MCTSMeta
-from gamestate import GameState
+from gamestate import GameState, transform_cell, zobrist_keys
+from solver import Solver
+from inferior import pruned_moves
+from randomstream import RandomStream
+from qualityrewards import QualityRewards
+from profiler import SearchProfiler
+
+# cell tuples per board size, shared by the untried moves of all the nodes
+_CELLS = {}
+
+
+def shared_cells(size: int) -> list:
+    """
+    Return the cell tuples of the passed board size, indexed [x][y].
+    """
+    if size not in _CELLS:
+        _CELLS[size] = [[(x, y) for y in range(size)] for x in range(size)]
+    return _CELLS[size]
+
 
 
 class Node:
@@ -17,12 +37,17 @@ class Node:
         parent:
         N (int): times this position was visited
         Q (int): average reward (wins-losses) from this position
+        Q2 (int): sum of the squared rewards from this position
         Q_RAVE (int): times this move has been critical in a rollout
         N_RAVE (int): times this move has appeared in a rollout
         children (dict): dictionary of successive nodes
-        outcome (int): If node is a leaf, then outcome indicates
-                       the winner, else None
+        outcome (int): If node is a leaf or its position has been solved
+                       exactly, then outcome indicates the winner, else none
+        untried (list): moves of the node whose child has not been created yet
+        prior (float): prior score in [0, 1] of the move, for progressive bias
     """
+    __slots__ = ('move', '_parent', 'N', 'Q', 'Q2', 'Q_RAVE', 'N_RAVE', 'children', 'outcome', 'untried',
+                 'prior', '__weakref__')
 
     def __init__(self, move: tuple = None, parent: object = None):
         """
@@ -31,13 +56,30 @@ class Node:
 
         """
         self.move = move
-        self.parent = parent
+        self.parent = parent  # kept as a weak reference, see parent
         self.N = 0  # times this position was visited
         self.Q = 0  # average reward (wins-losses) from this position
+        self.Q2 = 0  # sum of the squared rewards, for the reward variance
         self.Q_RAVE = 0  # times this move has been critical in a rollout
         self.N_RAVE = 0  # times this move has appeared in a rollout
         self.children = {}
         self.outcome = GameMeta.PLAYERS['none']
+        self.untried = ()
+        self.prior = 0.0
+
+    @property
+    def parent(self):
+        """
+        Return the parent of this node, None for the root. Only a weak reference
+        to it is stored so a tree holds no reference cycles and a discarded tree
+        is freed by reference counting alone, never by the cyclic collector.
+
+        """
+        return self._parent() if self._parent is not None else None
+
+    @parent.setter
+    def parent(self, parent) -> None:
+        self._parent = ref(parent) if parent is not None else None
 
     def add_children(self, children: dict) -> None:
         """
@@ -48,13 +90,14 @@ class Node:
             self.children[child.move] = child
 
     @property
-    def value(self, explore: float = MCTSMeta.EXPLORATION):
+    def value(self, explore: float = MCTSMeta.EXPLORATION, bias: float = MCTSMeta.BIAS_CONST):
         """
         Calculate the UCT value of this node relative to its parent, the parameter
         "explore" specifies how much the value should favor nodes that have
         yet to be thoroughly explored versus nodes that seem to have a high win
         rate.
-        Currently explore is set to 0.5.
+        Currently explore is set to 0.5. The progressive bias term adds the prior
+        of the move, fading as the node gets visits.
 
         """
         # if the node is not visited, set the value as infinity. Nodes with no visits are on priority
@@ -62,13 +105,26 @@ class Node:
         if self.N == 0:
             return 0 if explore == 0 else GameMeta.INF
         else:
-            return self.Q / self.N + explore * sqrt(2 * log(self.parent.N) / self.N)  # exploitation + exploration
+            return self.Q / self.N + explore * sqrt(2 * log(self.parent.N) / self.N) \
+                + bias * self.prior / (self.N + 1)  # exploitation + exploration + progressive bias
 
 
 class UctMctsAgent:
     """
     Basic no frills implementation of an agent that preforms MCTS for hex.
+    It is also the search engine of every other agent, which only swap its
+    components: the node class (tree store and selection formula), select_child,
+    roll_out (rollout policy, with reset_policy for its tables) and backup.
     Attributes:
+        node_class (type): class of the nodes of the tree
+        quality_based (bool): whether quality-based rewards are used by default
+        signed_rewards (bool): whether backup rewards a win with 1 and a loss
+                               with -1 rather than 1 and 0
+        lazy_children (bool): whether expand only records the moves of a node and
+                              creates the child of a move on its first visit
+        widening (bool): whether progressive widening is used: a node only
+                         considers its widening_limit() best children by prior,
+                         and the priors bias the values of the children
         root_state (GameState): Game simulator that helps us to understand the game situation
         root (Node): Root of the tree search
         run_time (int): time per each run
@@ -77,53 +133,136 @@ class UctMctsAgent:
         EXPLORATION (int): specifies how much the value should favor
                            nodes that have yet to be thoroughly explored versus nodes
                            that seem to have a high win rate.
+        solver (Solver): exact endgame solver with its transposition table
+        solver_threshold (int): positions with at most this many empty cells are
+                                solved exactly when they are expanded
+        rng (RandomStream): random numbers of this agent, seeded by seed
+        quality (QualityRewards): quality-based reward layer used by backup, None
+                                  for plain rewards
+        profiler (SearchProfiler): per-phase timing of the search, None unless
+                                   enabled with set_profiling
+        interrupted (bool): set by interrupt() to end the running search early
     """
+    node_class = Node
+    quality_based = False
+    signed_rewards = False
+    lazy_children = True
 
-    def __init__(self, state=GameState(8)):
+    def __init__(self, state=GameState(8), seed=None, quality_based: bool = None):
         self.root_state = deepcopy(state)
-        self.root = Node()
+        self.root = self.node_class()
         self.run_time = 0
         self.node_count = 0
         self.num_rollouts = 0
+        self.solver = Solver()
+        self.solver_threshold = MCTSMeta.SOLVER_THRESHOLD
+        self.widening = MCTSMeta.PROGRESSIVE_WIDENING
+        self.rng = RandomStream(seed)
+        if quality_based is None:
+            quality_based = self.quality_based
+        self.quality = QualityRewards(self.rng, self.root_state) if quality_based else None
+        self.profiler = None
+        self.interrupted = False
+        self.reset_policy()
+
+    def reset_policy(self) -> None:
+        """
+        Clear what the rollout policy has learned, called whenever the game state
+        is set. Random rollouts keep nothing.
+        """
 
-    def search(self, time_budget: int) -> None:
+    def search(self, time_budget: int, callback=None, interval: float = 1.0) -> None:
         """
         Search and update the search tree for a
         specified amount of time in seconds.
 
+        Args:
+            time_budget: seconds to search
+            callback: called with the agent every interval seconds of the search,
+                      e.g. to report analysis()
+            interval: seconds between two calls of the callback
+
         """
         start_time = clock()
         num_rollouts = 0
-
-        # do until we exceed our time budget
-        while clock() - start_time < time_budget:
-            node, state = self.select_node()
-            turn = state.turn()
-            outcome = self.roll_out(state)
-            self.backup(node, turn, outcome)
-            num_rollouts += 1
+        next_report = start_time + interval
+        if self.profiler is not None:
+            self.profiler.reset()
+        # the tree holds no reference cycles, so the cyclic collector only
+        # costs time during the search; it runs again once the search is over.
+        # An unbounded search (e.g. analysis) never pauses it, as the garbage of
+        # the rest of the process would pile up for as long as it runs
+        paused = MCTSMeta.PAUSE_GC and time_budget != float('inf') and gc.isenabled()
+        if paused:
+            gc.disable()
+
+        try:
+            # do until we exceed our time budget, the root position is solved or
+            # another thread interrupts the search
+            while clock() - start_time < time_budget and self.root.outcome == GameMeta.PLAYERS['none'] \
+                    and not self.interrupted:
+                self.simulate()
+                num_rollouts += 1
+                if callback is not None and clock() >= next_report:
+                    self.num_rollouts = num_rollouts
+                    callback(self)
+                    next_report += interval
+        finally:
+            if paused:
+                gc.enable()
+        self.interrupted = False
         run_time = clock() - start_time
         node_count = self.tree_size()
+        if self.profiler is not None:
+            self.profiler.elapsed = run_time
         self.run_time = run_time
         self.node_count = node_count
         self.num_rollouts = num_rollouts
 
+    def simulate(self) -> None:
+        """
+        Run one iteration of the search: select a node, play out its position
+        and back the result up the tree.
+
+        """
+        node, state = self.select_node()
+        turn = state.turn()
+        # proven nodes already know their winner so no rollout is needed
+        if node.outcome != GameMeta.PLAYERS['none']:
+            outcome = node.outcome
+            if self.quality is not None:
+                self.quality.observe(None)
+        else:
+            outcome = self.roll_out(state)
+            if self.quality is not None:
+                self.quality.observe(state)
+        self.backup(node, turn, outcome, state)
+
     def select_node(self) -> tuple:
         """
         Select a node in the tree to preform a single simulation from.
 
         """
         node = self.root
-        state = deepcopy(self.root_state)
-
-        # stop if we find reach a leaf node
-        while len(node.children) != 0:
-            # descend to the maximum value node, break ties at random
-            children = node.children.values()
-            max_value = max(children, key=lambda n: n.value).value
-            max_nodes = [n for n in node.children.values()
-                         if n.value == max_value]
-            node = choice(max_nodes)
+        state = self.copy_root_state()
+
+        # stop if we find reach a leaf node or a solved node
+        while node.outcome == GameMeta.PLAYERS['none']:
+            # children proven to be lost for the player to move are never selected
+            children = [n for n in node.children.values()
+                        if n.outcome in (GameMeta.PLAYERS['none'], state.turn())]
+            # moves without a child have not been explored, select them before
+            # any explored child or with widening once the node has enough visits
+            if node.untried and (not self.widening or len(children) == 0
+                                 or len(node.children) < self.widening_limit(node)):
+                node = self.add_child(node, state)
+                state.play(node.move)
+                return node, state
+            if len(node.children) == 0:
+                break
+            if self.widening and not self.lazy_children:
+                children = nlargest(self.widening_limit(node), children, key=self.rank)
+            node = self.select_child(node, children)
             state.play(node.move)
 
             # if some child node has not been explored select it before expanding
@@ -132,35 +271,167 @@ class UctMctsAgent:
                 return node, state
 
         # if we reach a leaf node generate its children and return one of them
-        # if the node is terminal, just return the terminal node
-        if self.expand(node, state):
-            node = choice(list(node.children.values()))
+        # if the node is terminal or solved, just return the node itself
+        if node.outcome == GameMeta.PLAYERS['none'] and self.expand(node, state) \
+                and node.outcome == GameMeta.PLAYERS['none']:
+            if node.untried:
+                node = self.add_child(node, state)
+            elif self.widening:
+                node = max(node.children.values(), key=self.rank)
+            else:
+                node = self.rng.choice(list(node.children.values()))
             state.play(node.move)
         return node, state
 
+    def copy_root_state(self) -> GameState:
+        """
+        Return a copy of the root state for one simulation to play on.
+
+        """
+        return deepcopy(self.root_state)
+
+    def add_child(self, node: Node, state: GameState) -> Node:
+        """
+        Create and return the child of a random untried move of the passed node,
+        or with widening of its untried move with the best prior.
+
+        Args:
+            node: the node to add a child to
+            state: the position of the node
+        """
+        untried = node.untried
+        if self.widening:
+            # the untried moves are sorted by prior, best last
+            move = untried.pop()
+        else:
+            # move the drawn move to the end of the list so it is removed in constant time
+            i = self.rng.index(len(untried))
+            move = untried[i]
+            untried[i] = untried[-1]
+            untried.pop()
+        child = self.node_class(move, node)
+        if self.widening:
+            child.prior = self.move_prior(state, move)
+        node.children[move] = child
+        return child
+
+    def widening_limit(self, node: Node) -> int:
+        """
+        Return the number of children the passed node considers under progressive
+        widening, growing with its visits.
+
+        """
+        return 1 + int(MCTSMeta.WIDENING_CONST * node.N ** MCTSMeta.WIDENING_EXPONENT)
+
+    def move_prior(self, state: GameState, move: tuple) -> float:
+        """
+        Return a cheap prior score in [0, 1] of the passed move: moves touching
+        more stones score higher, ties going to the moves nearer the centre.
+
+        """
+        stones = sum(1 for cell in state.neighbors(move) if state.board[cell] != GameMeta.PLAYERS['none'])
+        centre = (state.size - 1) / 2
+        dx, dy = move[0] - centre, move[1] - centre
+        distance = max(abs(dx), abs(dy), abs(dx + dy))
+        return (stones + 1 - distance / max(state.size - 1, 1)) / 7
+
     @staticmethod
-    def expand(parent: Node, state: GameState) -> bool:
+    def rank(child: Node) -> float:
+        """
+        Return the key ordering the existing children of a node for widening.
+
+        """
+        return child.prior
+
+    def select_child(self, node: Node, children: list) -> Node:
+        """
+        Return the child of the passed node to descend to.
+
+        Args:
+            node: the node being descended from
+            children: the children that may be selected
+
+        """
+        # descend to the maximum value node, break ties at random
+        max_value = max(children, key=lambda n: n.value).value
+        max_nodes = [n for n in children
+                     if n.value == max_value]
+        return self.rng.choice(max_nodes)
+
+    def expand(self, parent: Node, state: GameState) -> bool:
         """
         Generate the children of the passed "parent" node based on the available
-        moves in the passed gamestate and add them to the tree.
+        moves in the passed gamestate and add them to the tree. With lazy_children
+        only the moves are stored and their children are created by add_child
+        when first visited. With MCTSMeta.PRUNE_INFERIOR dead and captured cells
+        are left out. Positions with few enough empty cells are solved exactly
+        and the result is stored in the outcome of the nodes.
 
         Returns:
             bool: returns false If node is leaf (the game has ended).
 
         """
-        children = []
         if state.winner != GameMeta.PLAYERS['none']:
             # game is over at this node so nothing to expand
+            parent.outcome = state.winner
+            self.propagate_outcome(parent, state.turn())
             return False
 
-        for move in state.moves():
-            children.append(Node(move, parent))
-
-        parent.add_children(children)
+        moves = pruned_moves(state) if MCTSMeta.PRUNE_INFERIOR else state.moves()
+        if self.lazy_children:
+            cells = shared_cells(state.size)
+            parent.untried = [cells[x][y] for x, y in moves]
+            if self.widening:
+                parent.untried.sort(key=lambda move: self.move_prior(state, move))
+        else:
+            parent.add_children([self.node_class(move, parent) for move in moves])
+            if self.widening:
+                for child in parent.children.values():
+                    child.prior = self.move_prior(state, child.move)
+
+        empty_cells = state.size ** 2 - state.white_played - state.black_played
+        if empty_cells <= self.solver_threshold:
+            winner, winning_move = self.solver.solve(state, moves)
+            if winning_move is not None:
+                # a solution shared with a symmetric position may use a pruned cell
+                if winning_move not in parent.children:
+                    if winning_move in parent.untried:
+                        parent.untried.remove(winning_move)
+                    parent.add_children([self.node_class(winning_move, parent)])
+                parent.children[winning_move].outcome = winner
+            else:
+                # every move of the player to move loses
+                for child in parent.children.values():
+                    child.outcome = winner
+            parent.outcome = winner
+            self.propagate_outcome(parent, state.turn())
         return True
 
     @staticmethod
-    def roll_out(state: GameState) -> int:
+    def propagate_outcome(node: Node, turn: int) -> None:
+        """
+        Propagate the proven outcome of the passed node towards the root as in
+        MCTS-Solver: a parent is won if one of its children is won for the player
+        to move at the parent, and lost if all of its children are lost.
+
+        Args:
+            node: the node which has just been proven
+            turn: the player to move at that node
+
+        """
+        winner = node.outcome
+        parent = node.parent
+        turn = GameMeta.PLAYERS['white'] if turn == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+        while parent is not None:
+            # a move without a child is not proven
+            if winner != turn and (parent.untried or
+                                   any(child.outcome != winner for child in parent.children.values())):
+                break
+            parent.outcome = winner
+            parent = parent.parent
+            turn = GameMeta.PLAYERS['white'] if turn == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+
+    def roll_out(self, state: GameState) -> int:
         """
         Simulate an entirely random game from the passed state and return the winning
         player.
@@ -174,15 +445,18 @@ class UctMctsAgent:
         """
         moves = state.moves()  # Get a list of all possible moves in current state of the game
 
+        rng = self.rng
         while state.winner == GameMeta.PLAYERS['none']:
-            move = choice(moves)
+            # move the drawn cell to the end of the list so it is removed in constant time
+            i = rng.index(len(moves))
+            move = moves[i]
+            moves[i] = moves[-1]
+            moves.pop()
             state.play(move)
-            moves.remove(move)
 
         return state.winner
 
-    @staticmethod
-    def backup(node: Node, turn: int, outcome: int) -> None:
+    def backup(self, node: Node, turn: int, outcome: int, state: GameState = None) -> None:
         """
         Update the node statistics on the path from the passed node to root to reflect
         the outcome of a randomly simulated playout.
@@ -191,6 +465,7 @@ class UctMctsAgent:
             node:
             turn: winner turn
             outcome: outcome of the rollout
+            state: final state of the rollout
 
         Returns:
             object:
@@ -199,12 +474,18 @@ class UctMctsAgent:
         # Careful: The reward is calculated for player who just played
         # at the node and not the next player to play
         reward = 0 if outcome == turn else 1
+        player = GameMeta.PLAYERS['white'] if turn == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
+        quality = self.quality
 
         while node is not None:
             node.N += 1
-            node.Q += reward
+            # the quality bonus works on the signed scale, so it also deepens losses
+            value = reward if quality is None else (quality.reward(2 * reward - 1, player) + 1) / 2
+            node.Q += value
+            node.Q2 += value * value
             node = node.parent
             reward = 0 if reward == 1 else 1
+            player = GameMeta.PLAYERS['white'] if player == GameMeta.PLAYERS['black'] else GameMeta.PLAYERS['black']
 
     def best_move(self) -> tuple:
         """
@@ -215,10 +496,22 @@ class UctMctsAgent:
         if self.root_state.winner != GameMeta.PLAYERS['none']:
             return GameMeta.GAME_OVER
 
+        # a solved root may have been reached without being expanded
+        if len(self.root.children) == 0 and not self.root.untried:
+            self.expand(self.root, deepcopy(self.root_state))
+        # a root without children, e.g. after no search at all, has no best move
+        if len(self.root.children) == 0:
+            return self.rng.choice(self.root.untried)
+
+        # a child proven to win for the player to move is always the best move
+        for child in self.root.children.values():
+            if child.outcome == self.root_state.turn():
+                return child.move
+
         # choose the move of the most simulated node breaking ties randomly
         max_value = max(self.root.children.values(), key=lambda n: n.N).N
         max_nodes = [n for n in self.root.children.values() if n.N == max_value]
-        bestchild = choice(max_nodes)
+        bestchild = self.rng.choice(max_nodes)
         return bestchild.move
 
     def move(self, move: tuple) -> None:
@@ -229,30 +522,198 @@ class UctMctsAgent:
         Args:
             move:
         """
-        if move in self.root.children:
-            child = self.root.children[move]
-            child.parent = None
-            self.root = child
-            self.root_state.play(child.move)
-            return
+        self.move_sequence([move])
 
-        # if for whatever reason the move is not in the children of
-        # the root just throw out the tree and start over
-        self.root_state.play(move)
-        self.root = Node()
+    def move_sequence(self, moves: list) -> None:
+        """
+        Make the passed moves in order and update the tree appropriately, e.g.
+        to catch up with several moves played since the last search. The node
+        reached by walking the moves down from the root becomes the new root; if
+        the tree does not hold that path, the same position reached in another
+        move order is looked up and only if there is none the tree starts over.
+
+        Args:
+            moves: cells played in order from the root position
+        """
+        node = self.root
+        for move in moves:
+            node = node.children.get(move)
+            if node is None:
+                break
+        transform = 0
+        if node is None:
+            state = deepcopy(self.root_state)
+            for move in moves:
+                state.play(move)
+            node, transform = self.find_node(state)
+            self.root_state = state
+        else:
+            for move in moves:
+                self.root_state.play(move)
+        if node is None:
+            self.root = self.node_class()
+        else:
+            self.reroot(node, transform)
+        if self.quality is not None:
+            self.quality.reset(self.root_state)
 
     def set_gamestate(self, state: GameState) -> None:
         """
-        Set the root_state of the tree to the passed gamestate, this clears all
-        the information stored in the tree since none of it applies to the new
-        state.
+        Set the root_state of the tree to the passed gamestate. If the tree holds
+        the new position, e.g. after stones placed out of turn or a change of the
+        player to move, its subtree becomes the new tree; otherwise all the
+        information stored in the tree is cleared since none of it applies to the
+        new state.
 
         """
+        node, transform = self.find_node(state)
         self.root_state = deepcopy(state)
-        self.root = Node()
+        if node is None:
+            self.root = self.node_class()
+            self.solver = Solver()
+            self.reset_policy()
+        else:
+            self.reroot(node, transform)
+        if self.quality is not None:
+            self.quality.reset(self.root_state)
+
+    def find_node(self, state: GameState) -> tuple:
+        """
+        Look the position of the passed state up in the tree. Positions are
+        compared by zobrist hash under every symmetry of the board, so a colour
+        switched position is found too, e.g. a handicap stone of black on the
+        empty board is the transposed first move of white. Only the branches
+        whose moves are stones of the position are walked, so the search itself
+        keeps no index and the lookup stays cheap on big trees.
+
+        Returns:
+            tuple: the most visited node holding the position and the transform
+                   mapping its moves to the cells of the state, (None, None) if
+                   the tree does not hold the position
+        """
+        root_state = self.root_state
+        depth = state.white_played + state.black_played - root_state.white_played - root_state.black_played
+        if state.size != root_state.size or depth < 0:
+            return None, None
+        keys = zobrist_keys(state.size)
+        target = state.hash
+        white, black = GameMeta.PLAYERS['white'], GameMeta.PLAYERS['black']
+        swap = {white: black, black: white}
+        best, best_transform = None, None
+        for transform in range(4):
+            stack = [(self.root, root_state.hashes[transform], root_state.turn(), 0)]
+            while stack:
+                node, key, turn, level = stack.pop()
+                # transforms 2 and 3 swap the colours of the players
+                colour = turn if transform < 2 else swap[turn]
+                if level == depth:
+                    if key ^ keys['turn'][colour] == target and (best is None or node.N > best.N):
+                        best, best_transform = node, transform
+                    continue
+                for move, child in node.children.items():
+                    if state.board[transform_cell(move, transform, state.size)] == colour:
+                        stack.append((child, key ^ keys[turn][move][transform], swap[turn], level + 1))
+        return best, best_transform
+
+    def reroot(self, node: Node, transform: int = 0) -> None:
+        """
+        Make the passed node the root of the tree, mapping the moves of its
+        subtree (and the winners of its proven nodes) through the passed
+        transform of the board.
+
+        """
+        node.parent = None
+        self.root = node
+        if transform == 0:
+            return
+        # the replies learned by the rollout policy are not transformed
+        self.reset_policy()
+        size = self.root_state.size
+        swap = {GameMeta.PLAYERS['white']: GameMeta.PLAYERS['black'],
+                GameMeta.PLAYERS['black']: GameMeta.PLAYERS['white']}
+        node.move = None
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if transform >= 2:
+                node.outcome = swap.get(node.outcome, node.outcome)
+            node.untried = [transform_cell(move, transform, size) for move in node.untried]
+            node.children = {transform_cell(move, transform, size): child for move, child in node.children.items()}
+            for move, child in node.children.items():
+                child.move = move
+                stack.append(child)
+
+    def interrupt(self) -> None:
+        """
+        Ask a search running in another thread to stop after its current
+        simulation.
+
+        """
+        self.interrupted = True
+
+    def principal_variation(self, node: Node) -> list:
+        """
+        Return the moves from the passed node down the most simulated children.
+
+        """
+        moves = [node.move]
+        while len(node.children) != 0:
+            node = max(node.children.values(), key=lambda n: n.N)
+            if node.N == 0:
+                break
+            moves.append(node.move)
+        return moves
+
+    def analysis(self, k: int = 5) -> list:
+        """
+        Return the statistics of the k most simulated children of the root.
+
+        Returns:
+            list: a dict per child, best first, with its move, visits N, win
+                  rate Q of the player to move at the root, RAVE win rate (None
+                  without RAVE statistics), proven winner and principal variation;
+                  the win rates are in [0, 1] whatever the rewards of the agent
+        """
+        children = sorted(self.root.children.values(), key=lambda n: n.N, reverse=True)[:k]
+        return [{'move': child.move,
+                 'N': child.N,
+                 'Q': self.win_rate(child.Q / child.N) if child.N else 0.0,
+                 'rave': self.win_rate(child.Q_RAVE / child.N_RAVE) if child.N_RAVE else None,
+                 'outcome': child.outcome,
+                 'pv': self.principal_variation(child)}
+                for child in children]
+
+    def win_rate(self, value: float) -> float:
+        """
+        Map a mean reward of the backup to a win probability in [0, 1]. Quality
+        bonuses may take the mean slightly past the reward scale, it is clamped.
+
+        """
+        if self.signed_rewards:
+            value = (value + 1) / 2
+        return min(1.0, max(0.0, value))
+
+    def set_profiling(self, enabled: bool) -> None:
+        """
+        Switch the search profiler on or off. A disabled profiler leaves the
+        plain search methods in place and costs nothing.
+
+        """
+        if enabled and self.profiler is None:
+            self.profiler = SearchProfiler()
+            self.profiler.attach(self)
+        elif not enabled and self.profiler is not None:
+            self.profiler.detach(self)
+            self.profiler = None
 
     def statistics(self) -> tuple:
-        return self.num_rollouts, self.node_count, self.run_time
+        """
+        Return the number of rollouts, the tree size and the run time of the last
+        search, followed by the report of the profiler (None when profiling is off).
+
+        """
+        profile = self.profiler.report() if self.profiler is not None else None
+        return self.num_rollouts, self.node_count, self.run_time, profile
 
     def tree_size(self) -> int:
         """